@@ -4,46 +4,58 @@ from flask import Flask, session, redirect, url_for
 from flask_login import LoginManager
 from sqlalchemy import text, inspect
 
-from app.config import config
-from app.models import db, User
+from app.config import load_config
+from app.models import db
 from app.routes.public_routes import public_bp
 from app.routes.user_routes import user_bp
 from app.routes.admin_routes import admin_bp
+from app.services.booking_cache import init_bookings_cache
+from app.services.catalog_service import init_catalog_cache
+from app.services.search_service import SearchService
+from app.services.stats_service import StatsService
+from app.services.user_loader import init_user_cache, load_user_snapshot
+from app.utils.cache import init_cache
+from app.utils.db_pool import InstrumentedQueuePool
+from app.utils.logging_config import configure_logging
+from app.utils.schema import SchemaUpgradeError, upgrade_schema
+from app.utils.secret_provider import init_secrets, use_db_credentials
 
 login_manager = LoginManager()
 
-# Set up logging
-logging.basicConfig(
-    level=logging.DEBUG,  # Options: DEBUG, INFO, WARNING, ERROR, CRITICAL
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),  # Log to a file named app.log
-        logging.StreamHandler()         # Log to the console
-    ]
-)
 logger = logging.getLogger(__name__)
 
 def create_app():
     """Application factory for creating and configuring the Flask app."""
     
+    # Queued, JSON logging for the whole process (LOG_LEVEL, LOG_LEVELS, LOG_FORMAT, ...)
+    configure_logging()
+
     app = Flask(__name__)
 
     app.secret_key = os.getenv('SECRET_KEY', 'my_secret_key')
     
-    env = os.getenv("FLASK_ENV", "development2") 
-    app.config.from_object(config[env])
+    env = os.getenv("FLASK_ENV", "development2")
+    app.config.from_mapping(load_config(env))
+    InstrumentedQueuePool.slow_checkout_seconds = app.config.get("DB_POOL_SLOW_CHECKOUT_MS", 100) / 1000
+    init_cache(app)
+    init_catalog_cache(app)
+    init_user_cache(app)
+    init_bookings_cache(app)
+    init_secrets(app)
 
  
 
+    # Route listing and the connection check are opt-in (STARTUP_DIAGNOSTICS)
+    diagnostics = app.config.get("STARTUP_DIAGNOSTICS", False)
+
     # Register blueprints
-    print("🔧 Registering Blueprints...")
     app.register_blueprint(public_bp, url_prefix='/public')
     app.register_blueprint(user_bp, url_prefix='/user')
     app.register_blueprint(admin_bp)
 
     logger.info("Blueprints registered successfully")
 
-    with app.app_context():
+    if diagnostics:
         print("🔍 Registered Admin Blueprint Endpoints:")
         for rule in app.url_map.iter_rules():
             if rule.endpoint.startswith(admin_bp.name + "."):
@@ -53,26 +65,41 @@ def create_app():
     try:
         db.init_app(app)
         with app.app_context():
-            db.session.execute(text("SELECT 1"))
-            print(f"✅ Database connected to {app.config.get('DB_HOST', 'Unknown Host')}")
-
-            inspector = inspect(db.engine)
-            tables_exist = bool(inspector.get_table_names())
-
-            if app.config.get("CREATE_DB", False) and not tables_exist:
-                print("⚠️ No tables found and CREATE_DB is enabled. Creating tables...")
-                db.create_all()
-                print("✅ Tables created successfully.")
-
+            # Before the first connection, so every connection uses the current credentials
+            if app.config.get("DB_SECRET_NAME"):
+                for engine in db.engines.values():
+                    use_db_credentials(engine, app.config["DB_SECRET_NAME"])
+
+            if diagnostics:
+                db.session.execute(text("SELECT 1"))
+                print(f"✅ Database connected to {app.config.get('DB_HOST', 'Unknown Host')}")
+
+            # Disable (SCHEMA_CHECK_ON_STARTUP=false) where the schema is managed separately
+            if app.config.get("SCHEMA_CHECK_ON_STARTUP", True):
+                inspector = inspect(db.engine)
+                tables_exist = bool(inspector.get_table_names())
+
+                if app.config.get("CREATE_DB", False) and not tables_exist:
+                    print("⚠️ No tables found and CREATE_DB is enabled. Creating tables...")
+                    db.create_all()
+                    print("✅ Tables created successfully.")
+                    tables_exist = True
+
+                if tables_exist:
+                    upgrade_schema(db.engine)
+                    SearchService().ensure_schema()
+
+    except SchemaUpgradeError:
+        # Starting without a required unique index would break every booking
+        raise
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
 
     # Setup login manager
     login_manager.init_app(app)
 
-    @login_manager.user_loader
-    def load_user(user_id):
-        return User.query.get(int(user_id))
+    # Cached, detached user snapshots instead of a users SELECT per request
+    login_manager.user_loader(load_user_snapshot)
 
     @app.context_processor
     def inject_user_id():
@@ -87,4 +114,10 @@ def create_app():
 
     logger.info("Flask-Login initialized")
 
+    @app.cli.command("repair-booking-counters")
+    def repair_booking_counters():
+        """Recompute course booking counters and daily totals from subscriptions."""
+        result = StatsService().rebuild_counters()
+        print(f"✅ Rebuilt booking counters for {result['courses']} courses and {result['days']} days.")
+
     return app
@@ -1,30 +1,130 @@
-import boto3
 import os
-import json
+from app.utils.db_pool import InstrumentedQueuePool
+from app.utils.secret_provider import get_secret_provider
+
+def get_secret(secret_name):
+    """Retrieve secret from AWS Secrets Manager (cached; see app.utils.secret_provider)."""
+    return get_secret_provider().get(secret_name)
+
+def _env_flag(name, default):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+def _cache_ttl(name, default):
+    """
+    TTL setting of a cache invalidated on writes.
+
+    The memory backend is per process, so an invalidation only reaches the
+    worker that made the change; there the default is capped at
+    MEMORY_CACHE_TTL seconds to bound how stale other workers can be.
+    """
+    if os.getenv('CACHE_BACKEND', 'memory') == 'memory':
+        default = min(default, int(os.getenv('MEMORY_CACHE_TTL', '5')))
+    return int(os.getenv(name, default))
+
+
+def engine_options(pool_size=5, max_overflow=10, pool_recycle=1800, pool_timeout=30,
+                   pool_pre_ping=True, statement_timeout_ms=0):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for a PostgreSQL config class.
+
+    Arguments are the environment's defaults; DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE, DB_POOL_TIMEOUT, DB_POOL_PRE_PING and DB_STATEMENT_TIMEOUT_MS
+    override them. Pool sizes are per process, so size them against the threads
+    of one worker, not the whole service.
+    """
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": int(os.getenv('DB_POOL_SIZE', pool_size)),
+        "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', max_overflow)),
+        "pool_recycle": int(os.getenv('DB_POOL_RECYCLE', pool_recycle)),  # seconds; below RDS/proxy idle timeouts
+        "pool_timeout": int(os.getenv('DB_POOL_TIMEOUT', pool_timeout)),  # seconds to wait for a free connection
+        "pool_pre_ping": _env_flag('DB_POOL_PRE_PING', pool_pre_ping),  # replace connections killed by failovers
+    }
+    statement_timeout_ms = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', statement_timeout_ms))
+    if statement_timeout_ms:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout_ms}"}
+    return options
+
+
+def postgres_settings(user, password, host, port, name):
+    """Connection settings for a PostgreSQL environment, with DB_* env overrides."""
+    db_user = os.getenv('DB_USER', user)
+    db_password = os.getenv('DB_PASSWORD', password)
+    db_host = os.getenv('DB_HOST', host)
+    db_port = os.getenv('DB_PORT', port)
+    db_name = os.getenv('DB_NAME', name)
+    return {
+        "DB_USER": db_user,
+        "DB_PASSWORD": db_password,
+        "DB_HOST": db_host,
+        "DB_PORT": db_port,
+        "DB_NAME": db_name,
+        "SQLALCHEMY_DATABASE_URI": f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}",
+    }
 
-def get_secret(secret_name, region_name="eu-west-1"):
-    """Retrieve secret from AWS Secrets Manager."""
-    session = boto3.session.Session()
-    client = session.client(service_name="secretsmanager", region_name=region_name)
-
-    try:
-        secret_value = client.get_secret_value(SecretId=secret_name)
-        secret = json.loads(secret_value['SecretString'])
-        return secret
-    except Exception as e:
-        raise RuntimeError(f"Error retrieving secret: {e}")
 
 class Config:
+    """
+    Settings shared by every environment.
+
+    Class attributes are constants. Anything read from the environment lives in
+    settings(), which load_config() calls for the selected environment only.
+    """
     SECRET_KEY = "supersecretkey"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     CREATE_DB = False
     SESSION_PERMANENT = False
-    SESSION_USE_SIGNER = True 
+    SESSION_USE_SIGNER = True
+
+    @classmethod
+    def settings(cls):
+        return {
+            # Print blueprint routes and check the database connection while starting up
+            "STARTUP_DIAGNOSTICS": _env_flag('STARTUP_DIAGNOSTICS', False),
+            # Create/upgrade tables and search indexes while starting up
+            "SCHEMA_CHECK_ON_STARTUP": _env_flag('SCHEMA_CHECK_ON_STARTUP', True),
+
+            # Cache backend for all service-layer caches: "memory" (per process) or "redis" (shared)
+            "CACHE_BACKEND": os.getenv('CACHE_BACKEND', 'memory'),
+            "CACHE_REDIS_URL": os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+            "CACHE_KEY_PREFIX": os.getenv('CACHE_KEY_PREFIX', 'moviemaking:'),
+            "CACHE_LOCAL_TTL": int(os.getenv('CACHE_LOCAL_TTL', '10')),  # seconds; per-process copy of redis entries, 0 disables
+            "CACHE_INVALIDATION_CHANNEL": os.getenv('CACHE_INVALIDATION_CHANNEL', 'moviemaking:cache-invalidation'),
+
+            # Course catalog cache
+            "CATALOG_CACHE_TTL": int(os.getenv('CATALOG_CACHE_TTL', '300')),  # seconds
+            "CATALOG_CACHE_MAXSIZE": int(os.getenv('CATALOG_CACHE_MAXSIZE', '128')),
+
+            # Flask-Login user snapshot cache
+            "USER_CACHE_TTL": _cache_ttl('USER_CACHE_TTL', 300),  # seconds; bounds how long a role change takes
+            "USER_CACHE_MAXSIZE": int(os.getenv('USER_CACHE_MAXSIZE', '10000')),
+
+            # Per-user "my bookings" cache
+            "USER_BOOKINGS_CACHE_TTL": _cache_ttl('USER_BOOKINGS_CACHE_TTL', 300),  # seconds
+            "USER_BOOKINGS_CACHE_MAXSIZE": int(os.getenv('USER_BOOKINGS_CACHE_MAXSIZE', '10000')),
+
+            # Rows committed per transaction by the admin catalog import
+            "IMPORT_BATCH_SIZE": int(os.getenv('IMPORT_BATCH_SIZE', '1000')),
+
+            # Connection checkouts waiting at least this long are logged as slow
+            "DB_POOL_SLOW_CHECKOUT_MS": int(os.getenv('DB_POOL_SLOW_CHECKOUT_MS', '100')),
+
+            # Secrets Manager: "aws", or "local" to read SECRETS_LOCAL_FILE (JSON of name -> secret)
+            "SECRETS_BACKEND": os.getenv('SECRETS_BACKEND', 'aws'),
+            "SECRETS_LOCAL_FILE": os.getenv('SECRETS_LOCAL_FILE'),
+            "SECRETS_REGION": os.getenv('SECRETS_REGION', 'eu-west-1'),
+            "SECRETS_TTL": int(os.getenv('SECRETS_TTL', '300')),  # seconds
+            "SECRETS_REFRESH_AHEAD": int(os.getenv('SECRETS_REFRESH_AHEAD', '60')),  # seconds before expiry
+            "SECRETS_MAX_STALE": int(os.getenv('SECRETS_MAX_STALE', '3600')),  # seconds served past expiry while refreshing
+            # Secret holding the database "username"/"password"; overrides DB_USER/DB_PASSWORD when set
+            "DB_SECRET_NAME": os.getenv('DB_SECRET_NAME'),
+        }
 
 
 class DevelopmentConfig(Config):
     DEBUG = True
-    SQLALCHEMY_ECHO = True
+    SQLALCHEMY_ECHO = False  # Log SQL queries with LOG_LEVELS=sqlalchemy.engine=INFO
     CREATE_DB = True
 
     DB_USER = "postgres"
@@ -36,50 +136,46 @@ class DevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = (
         f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
-    
-    # Log Database URI for debugging (Optional)
-    print(f"Connecting to database at {DB_HOST}:{DB_PORT}")
-    
+
+    @classmethod
+    def settings(cls):
+        return {**super().settings(), "SQLALCHEMY_ENGINE_OPTIONS": engine_options()}
+
 class DevelopmentConfig2(Config):
      """Development configuration (AWS database)."""
      DEBUG = True
-     SQLALCHEMY_ECHO = True  # Log SQL queries
+     SQLALCHEMY_ECHO = False  # Log SQL queries with LOG_LEVELS=sqlalchemy.engine=INFO
      CREATE_DB = True  # Automatically create tables in development
 
-     # Environment variables for other configurations
-     DB_USER = os.getenv('DB_USER', 'DB_Admin')
-     DB_PASSWORD = os.getenv('DB_PASSWORD', '2ZnaqSZ:')
-     DB_HOST = os.getenv('DB_HOST', 'mydbinstance.endpoint.amazonaws.com')
-     DB_PORT = os.getenv('DB_PORT', '5432')
-     DB_NAME = os.getenv('DB_NAME', 'moviemaking_dev')
-
-     SQLALCHEMY_DATABASE_URI = (
-         f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-     )
-
-      # Mask the password in logs
-     print(f"Connecting to database at {DB_HOST}:{DB_PORT} with user {DB_USER}")
+     @classmethod
+     def settings(cls):
+         return {
+             **super().settings(),
+             **postgres_settings('DB_Admin', '2ZnaqSZ:', 'mydbinstance.endpoint.amazonaws.com', '5432', 'moviemaking_dev'),
+             "SQLALCHEMY_ENGINE_OPTIONS": engine_options(),
+         }
 
 
 class ProductionConfig(Config):
-    """Development configuration (AWS database)."""
-    DEBUG = True
-    SQLALCHEMY_ECHO = True  # Log SQL queries
+    """Production configuration (AWS database)."""
+    DEBUG = False
+    SQLALCHEMY_ECHO = False  # Log SQL queries with LOG_LEVELS=sqlalchemy.engine=INFO
     CREATE_DB = True  # Automatically create tables in development
 
-    # Environment variables for other configurations
-    DB_USER = os.getenv('DB_USER', 'DB_Admin')
-    DB_PASSWORD = os.getenv('DB_PASSWORD', '2ZnaqSZ:')
-    DB_HOST = os.getenv('DB_HOST', 'mydbinstance.endpoint.amazonaws.com')
-    DB_PORT = os.getenv('DB_PORT', '5432')
-    DB_NAME = os.getenv('DB_NAME', 'moviemaking_dev')
-
-    SQLALCHEMY_DATABASE_URI = (
-        f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    )
-
-    # Mask the password in logs
-    print(f"Connecting to database at {DB_HOST}:{DB_PORT} with user {DB_USER}")
+    @classmethod
+    def settings(cls):
+        return {
+            **super().settings(),
+            **postgres_settings('DB_Admin', '2ZnaqSZ:', 'mydbinstance.endpoint.amazonaws.com', '5432', 'moviemaking_dev'),
+            # One connection per gunicorn thread, a little overflow for bursts, and a
+            # statement timeout so a runaway query cannot hold a connection forever
+            "SQLALCHEMY_ENGINE_OPTIONS": engine_options(
+                pool_size=int(os.getenv('WEB_THREADS', '4')),
+                max_overflow=2,
+                pool_timeout=10,
+                statement_timeout_ms=30000,
+            ),
+        }
 
 
 class TestingConfig(Config):
@@ -88,6 +184,7 @@ class TestingConfig(Config):
     CREATE_DB = True
     WTF_CSRF_ENABLED = False
 
+    # In-memory SQLite keeps Flask-SQLAlchemy's single shared connection; no pool options
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
 
 
@@ -97,7 +194,22 @@ config = {
     "production": ProductionConfig,
     "testing": TestingConfig,
 }
-# Dynamically load the configuration
-flask_env = os.getenv("FLASK_ENV", "production")
-selected_config = config.get(flask_env, {ProductionConfig})
-print(f"Using configuration: {selected_config.__name__}")
+
+
+def load_config(env):
+    """
+    Resolve the settings of one environment.
+
+    Only the selected class's settings() runs, so other environments never
+    read their variables, fetch secrets or print anything.
+    :return: Dict for app.config.from_mapping().
+    :raises RuntimeError: If env names no known environment.
+    """
+    config_class = config.get(env)
+    if config_class is None:
+        raise RuntimeError(f"Unknown FLASK_ENV: {env!r} (expected one of {', '.join(config)})")
+
+    settings = {key: getattr(config_class, key) for key in dir(config_class) if key.isupper()}
+    settings.update(config_class.settings())
+    settings["CONFIG_NAME"] = config_class.__name__
+    return settings
@@ -15,6 +15,17 @@ class User(db.Model, UserMixin):
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.Enum('customer', 'admin', name='user_role'), default='customer', nullable=False)
 
+    __table_args__ = (
+        # Admin user listing: customers in name order
+        db.Index('ix_users_role_name', 'role', 'second_name', 'first_name', 'id'),
+        # Case-insensitive prefix search on the admin users page
+        db.Index('ix_users_email_lower', db.func.lower(email).label('email_lower'),
+                 postgresql_ops={'email_lower': 'text_pattern_ops'}),
+        db.Index('ix_users_first_name_lower', db.func.lower(first_name).label('first_name_lower'),
+                 postgresql_ops={'first_name_lower': 'text_pattern_ops'}),
+        db.Index('ix_users_second_name_lower', db.func.lower(second_name).label('second_name_lower'),
+                 postgresql_ops={'second_name_lower': 'text_pattern_ops'}),
+    )
 
     def set_password(self, password):
         """Hashes password before storing it."""
@@ -32,7 +43,14 @@ class Course(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)
+    capacity = db.Column(db.Integer, nullable=True)  # None means unlimited seats
+    seats_booked = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Non-cancelled bookings
+    # Booking counters maintained by StatsService in the same transaction as each booking change
+    bookings_total = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    bookings_pending = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    bookings_confirmed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    bookings_cancelled = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
 
 class Module(db.Model):
@@ -49,8 +67,8 @@ class CourseModule(db.Model):
     __tablename__ = 'course_modules'
 
     id = db.Column(db.Integer, primary_key=True)
-    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
-    module_id = db.Column(db.Integer, db.ForeignKey('modules.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False, index=True)
+    module_id = db.Column(db.Integer, db.ForeignKey('modules.id'), nullable=False, index=True)
 
     course = db.relationship('Course', backref=db.backref('modules', lazy=True))
     module = db.relationship('Module', backref=db.backref('course_modules', lazy=True))
@@ -71,5 +89,24 @@ class Subscriptions(db.Model):
     )
     subscription_date = db.Column(db.TIMESTAMP, server_default=db.func.current_timestamp())
 
+    __table_args__ = (
+        # One booking per user and course; also the conflict target for book_course.
+        # Its leading column serves every user_id lookup, so user_id needs no index of its own.
+        db.Index('uq_subscriptions_user_course', 'user_id', 'course_id', unique=True),
+        # Admin filtering by course and status in date order; also serves plain course_id lookups
+        db.Index('ix_subscriptions_course_status_date', 'course_id', 'status', 'subscription_date'),
+        # Keyset pagination of all bookings, and of one course's bookings, on (subscription_date, id)
+        db.Index('ix_subscriptions_date_id', 'subscription_date', 'id'),
+        db.Index('ix_subscriptions_course_date_id', 'course_id', 'subscription_date', 'id'),
+    )
+
     user = db.relationship('User', backref=db.backref('subscriptions', lazy=True))
     course = db.relationship('Course', backref=db.backref('subscriptions', lazy=True))
+
+
+class DailyBookingStats(db.Model):
+    """Number of bookings made per day, maintained as bookings are created and deleted."""
+    __tablename__ = 'daily_booking_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, default=0, server_default='0')
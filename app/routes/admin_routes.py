@@ -1,23 +1,18 @@
 import logging
-from flask import Blueprint, request, render_template, redirect, url_for, jsonify ,flash
-from app.models import User
-from app.services.admin_service import AdminService
+import os
+from datetime import date, timedelta
+from flask import Blueprint, request, render_template, redirect, url_for, jsonify ,flash, Response, stream_with_context, current_app
+from app.models import db, User, Subscriptions
+from app.services.admin_service import AdminService, EXPORT_FORMATS
+from app.utils.db_pool import pool_stats
 from app.utils.decorators import role_required
+from app.utils.importers import detect_format, iter_csv_rows, iter_json_rows
 from flask_login import login_user, logout_user, current_user
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()  # Ensure logs are sent to stdout for CloudWatch
-    ]
-)
 logger = logging.getLogger(__name__)
 
 error_template = "error.html"
-not_implemented = NotImplementedError("Implement this logic")
 
 # Define Blueprint
 admin_bp = Blueprint('admin', __name__)
@@ -48,66 +43,148 @@ def admin_login():
         if admin and admin.check_password(password):
             # Important: This is where you need to log the user in with Flask-Login
             login_user(admin)
-            logger.info(f"Admin login successful for email: {email}")
+            logger.info("Admin login successful for email: %s", email)
             return redirect(url_for('admin.admin_home'))
         else:
-            logger.warning(f"Login attempt failed for email: {email}")
+            logger.warning("Login attempt failed for email: %s", email)
             return render_template("AdminLogin.html", error="Invalid email or password.")
     except Exception as e:
-        logger.error(f"Error during login process: {e}", exc_info=True)
+        logger.error("Error during login process: %s", e, exc_info=True)
         return render_template(error_template, error_message="Unexpected error occurred during login.")
 
 @admin_bp.route('/admin/home', methods=['GET'])
 @role_required('admin')
 def admin_home():
-    """Render the admin home page."""
+    """Render the admin home page with the precomputed booking statistics."""
     logger.info("Rendering admin home page.")
-    return render_template("AdminHome.html")
+    try:
+        stats = admin_service.stats_service.get_dashboard()
+    except Exception as e:
+        # The dashboard is informational; keep the navigation usable without it
+        logger.error("Error loading dashboard statistics: %s", e, exc_info=True)
+        stats = None
+    return render_template("AdminHome.html", stats=stats)
+
+
+@admin_bp.route('/admin/metrics/db-pool', methods=['GET'])
+@role_required('admin')
+def db_pool_metrics():
+    """Report connection pool usage and checkout waits of the worker serving this request."""
+    stats = pool_stats(db.engine)
+    stats["pid"] = os.getpid()
+    return jsonify(stats)
 
 
 @admin_bp.route('/admin/bookings', methods=['GET'])
 @role_required('admin')
 def admin_bookings():
-    """Fetch and render all course bookings."""
+    """Fetch and render one page of course bookings."""
     try:
-        # Get course ID from query parameters
+        # Get course ID and paging parameters from query parameters
         course_id = request.args.get('course_id', type=int)
-        
+        cursor = request.args.get('cursor')
+        direction = request.args.get('direction', 'next')
+        page_size = request.args.get('page_size', type=int)
+
         if course_id:
             # Fetch bookings for the specific course ID
-            logger.info(f"Fetching bookings for Course ID: {course_id}")
-            bookings = admin_service.get_bookings_by_course(course_id)
+            logger.info("Fetching bookings for Course ID: %s", course_id)
+            page = admin_service.get_bookings_by_course(course_id, cursor=cursor, direction=direction, page_size=page_size)
         else:
             # Fetch all bookings
             logger.info("Fetching all bookings.")
-            bookings = admin_service.get_all_bookings()
-        
+            page = admin_service.get_all_bookings(cursor=cursor, direction=direction, page_size=page_size)
+
+        bookings = page["bookings"]
         if not bookings:
-            logger.warning(f"No bookings found{' for Course ID: ' + str(course_id) if course_id else ''}.")
-            return render_template("AdminBookings.html", bookings=[])
-        
-        logger.info(f"Successfully fetched {len(bookings)} bookings{' for Course ID: ' + str(course_id) if course_id else ''}.")
-        return render_template("AdminBookings.html", bookings=bookings)
+            logger.warning("No bookings found%s.", ' for Course ID: ' + str(course_id) if course_id else '')
+            return render_template("AdminBookings.html", bookings=[], course_id=course_id, page_size=page_size)
+
+        logger.info("Successfully fetched %s bookings%s.", len(bookings),
+                    ' for Course ID: ' + str(course_id) if course_id else '')
+        return render_template(
+            "AdminBookings.html",
+            bookings=bookings,
+            next_cursor=page["next_cursor"],
+            prev_cursor=page["prev_cursor"],
+            course_id=course_id,
+            page_size=page_size
+        )
     
     except Exception as e:
-        logger.error(f"Error fetching bookings: {e}", exc_info=True)
+        logger.error("Error fetching bookings: %s", e, exc_info=True)
         return render_template("error.html", error_message="Failed to load bookings.")
 
 
+@admin_bp.route('/admin/bookings/export', methods=['GET'])
+@role_required('admin')
+def export_bookings():
+    """
+    Stream bookings as CSV or NDJSON.
+
+    Query parameters: format (csv|ndjson), course_id, status, date_from and
+    date_to (YYYY-MM-DD, both inclusive).
+    """
+    export_format = request.args.get('format', 'csv').lower()
+    course_id = request.args.get('course_id', type=int)
+    status = request.args.get('status')
+
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"success": False, "message": f"Unsupported format: {export_format}"}), 400
+    if status and status not in Subscriptions.status.type.enums:
+        return jsonify({"success": False, "message": f"Invalid status: {status}"}), 400
+
+    try:
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+        date_from = date.fromisoformat(date_from) if date_from else None
+        # date_to is inclusive for the caller, exclusive in SQL
+        date_to = date.fromisoformat(date_to) + timedelta(days=1) if date_to else None
+    except ValueError:
+        return jsonify({"success": False, "message": "Dates must be in YYYY-MM-DD format."}), 400
+
+    logger.info("Exporting bookings as %s (course_id=%s, status=%s, date_from=%s, date_to=%s)",
+                export_format, course_id, status, date_from, date_to)
+    stream = admin_service.export_bookings(
+        export_format,
+        course_id=course_id,
+        status=status,
+        date_from=date_from,
+        date_to=date_to
+    )
+    response = Response(stream_with_context(stream), mimetype=EXPORT_FORMATS[export_format])
+    response.headers["Content-Disposition"] = f"attachment; filename=bookings.{export_format}"
+    return response
+
+
 @admin_bp.route('/admin/users', methods=['GET'])
 @role_required('admin')
 def admin_users():
-    """Fetch and render all users."""
+    """Fetch and render one page of users, optionally searched and sorted."""
     try:
-        # admin_service = AdminService()
-        users = admin_service.get_all_users()
+        search = request.args.get('q', '').strip()
+        sort = request.args.get('sort', 'name')
+        page = request.args.get('page', 1, type=int)
+        page_size = request.args.get('page_size', type=int)
+
+        result = admin_service.get_all_users(page=page, page_size=page_size, sort=sort, search=search)
+        users = result["users"]
         if not users:
             logger.warning("No users found.")
-            return render_template("AdminUsers.html", users=[])
-        logger.info(f"Successfully fetched {len(users)} users.")
-        return render_template("AdminUsers.html", users=users)
+        else:
+            logger.info("Successfully fetched %s of %s users.", len(users), result['total'])
+        return render_template(
+            "AdminUsers.html",
+            users=users,
+            total=result["total"],
+            page=result["page"],
+            page_size=result["page_size"],
+            has_next=result["has_next"],
+            sort=sort,
+            q=search
+        )
     except Exception as e:
-        logger.error(f"Error fetching users: {e}", exc_info=True)
+        logger.error("Error fetching users: %s", e, exc_info=True)
         return render_template(error_template, error_message="Failed to load users.")
 
 
@@ -116,14 +193,15 @@ def admin_users():
 def list_courses():
     """Fetch and render all courses."""
     try:
-        courses = admin_service.get_all_course_details()
+        sort = request.args.get('sort')
+        courses = admin_service.get_all_course_details(sort=sort)
         if not courses:
             logger.warning("No courses found.")
             return render_template("AdminCourseList.html", courses=[])
-        logger.info(f"Successfully fetched {len(courses)} courses.")
-        return render_template("AdminCourseList.html", courses=courses)
+        logger.info("Successfully fetched %s courses.", len(courses))
+        return render_template("AdminCourseList.html", courses=courses, sort=sort)
     except Exception as e:
-        logger.error(f"Error fetching courses: {e}", exc_info=True)
+        logger.error("Error fetching courses: %s", e, exc_info=True)
         return render_template(error_template, error_message="Failed to load courses.")
 
 
@@ -133,25 +211,67 @@ def update_booking_status(booking_id):
     """Update the status of a booking."""
     try:
         new_status = request.form.get('status')
-        logger.info(f"Updating booking status for ID: {booking_id} to {new_status}")
+        logger.info("Updating booking status for ID: %s to %s", booking_id, new_status)
         admin_service.update_booking_status(booking_id, new_status=new_status)
         return f"Booking status updated for ID {booking_id}."
     except Exception as e:
-        logger.error(f"Failed to update booking status for ID {booking_id}: {e}", exc_info=True)
+        logger.error("Failed to update booking status for ID %s: %s", booking_id, e, exc_info=True)
         return render_template(error_template, error_message="Failed to update booking status.")
 
+@admin_bp.route('/admin/bookings/status', methods=['POST'])
+@role_required('admin')
+def update_booking_statuses():
+    """
+    Update the status of many bookings at once.
+
+    Accepts JSON or form data: status (new status), and booking_ids and/or
+    course_id and current_status to select the bookings.
+    """
+    data = request.get_json(silent=True) or {}
+    if data:
+        booking_ids = data.get('booking_ids') or []
+        course_id = data.get('course_id')
+        current_status = data.get('current_status')
+        new_status = data.get('status')
+        # A string here would otherwise be split into digits ("12" -> [1, 2])
+        if not isinstance(booking_ids, list) or not all(
+                isinstance(booking_id, int) and not isinstance(booking_id, bool) for booking_id in booking_ids):
+            return jsonify({"success": False, "message": "booking_ids must be a list of integers."}), 400
+    else:
+        booking_ids = request.form.getlist('booking_ids[]') or request.form.getlist('booking_ids')
+        course_id = request.form.get('course_id')
+        current_status = request.form.get('current_status')
+        new_status = request.form.get('status')
+
+    try:
+        booking_ids = [int(booking_id) for booking_id in booking_ids]
+        course_id = int(course_id) if course_id not in (None, '') else None
+        updated = admin_service.update_booking_statuses(
+            new_status,
+            booking_ids=booking_ids,
+            course_id=course_id,
+            current_status=current_status or None
+        )
+        return jsonify({"success": True, "updated": updated})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        logger.error("Failed to batch update booking statuses: %s", e, exc_info=True)
+        return jsonify({"success": False, "message": "Failed to update booking statuses."}), 500
+
+
 @admin_bp.route('/admin/bookings/<int:booking_id>', methods=['PATCH'])
 @role_required('admin')
 def update_booking(booking_id):
     """Update a booking by its ID."""
     try:
-        logger.info(f"Updating booking with ID: {booking_id}")
+        logger.info("Updating booking with ID: %s", booking_id)
         updated_booking = request.form.get('booking')
         admin_service.update_booking(booking_id, updated_booking)
         # Add logic to update the booking
         return f"Booking {booking_id} updated successfully."
     except Exception as e:
-        logger.error(f"Failed to update booking with ID {booking_id}: {e}", exc_info=True)
+        logger.error("Failed to update booking with ID %s: %s", booking_id, e, exc_info=True)
         return render_template(error_template, error_message="Failed to load bookings"), 500
 
 @admin_bp.route('/admin/update-subscription/<int:booking_id>', methods=['POST'])
@@ -199,18 +319,28 @@ def update_course(course_id):
         name = data.get("name")
         description = data.get("description")
         price = data.get("price")
+        capacity = data.get("capacity")
 
-        result = admin_service.update_course(course_id, name, description, float(price) if price else None)
+        # Price and capacity are validated by the service; an empty capacity means unlimited
+        result = admin_service.update_course(
+            course_id, name, description,
+            price if price else None,
+            capacity
+        )
 
         if result:
-            raise not_implemented
-            return f"Course {course_id} updated successfully", 200
+            flash("Course updated successfully!", "success")
+            # 303 so the browser follows with a GET rather than repeating the PATCH
+            return redirect(url_for('admin.list_courses'), code=303)
         else:
-            logger.error(f"Course {course_id} not found")
+            logger.error("Course %s not found", course_id)
             return render_template(error_template, error_message="Course not found"), 404
 
+    except ValueError as e:
+        logger.warning("Invalid update for course %s: %s", course_id, e)
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
-        logger.error(f"Failed to update course {course_id}: {e}", exc_info=True)
+        logger.error("Failed to update course %s: %s", course_id, e, exc_info=True)
         return render_template(error_template, error_message="Failed to update course"), 500
 
 # Delete course
@@ -220,14 +350,18 @@ def delete_course(course_id):
     try:
         result = admin_service.delete_course(course_id)
         if result:
-            raise not_implemented
-            return f"Course {course_id} deleted successfully", 200
+            flash("Course deleted successfully!", "success")
+            return redirect(url_for('admin.list_courses'), code=303)
         else:
-            logger.error(f"Course {course_id} not found")
+            logger.error("Course %s not found", course_id)
             return render_template(error_template, error_message="Course not found"), 404
 
+    except ValueError as e:
+        # Missing course, or one that still has bookings
+        logger.warning("Could not delete course %s: %s", course_id, e)
+        return jsonify({"success": False, "message": str(e)}), 400
     except Exception as e:
-        logger.error(f"Failed to delete course {course_id}: {e}", exc_info=True)
+        logger.error("Failed to delete course %s: %s", course_id, e, exc_info=True)
         return render_template(error_template, error_message="Failed to delete course"), 500
 
 
@@ -237,23 +371,13 @@ def add_course():
     """
     Route to add a new course.
     """
-    # Collect course data
-    course_name = request.form.get('name')
-    course_description = request.form.get('description')
-    course_price = request.form.get('price')
-
     # Validation: Ensure course details are valid
-    if not course_name:
-        flash("Course name is required!", "error")
+    try:
+        course_data = admin_service.validate_course_data(request.form)
+    except ValueError as e:
+        flash(str(e), "error")
         return redirect(url_for('admin.create_course'))
 
-    # Prepare course data
-    course_data = {
-        'name': course_name,
-        'description': course_description,
-        'price': float(course_price) if course_price else 0.0
-    }
-
     # Save the course in the database
     course_id = admin_service.add_course(course_data)
 
@@ -305,6 +429,38 @@ def add_modules():
  
 
 
+@admin_bp.route('/admin/import-catalog', methods=['POST'])
+@role_required('admin')
+def import_catalog():
+    """
+    Bulk import courses and modules from an uploaded CSV, JSON array or JSON Lines file.
+
+    Form fields: file (required), format (csv|json, defaults to the file extension)
+    and batch_size (rows per transaction, defaults to IMPORT_BATCH_SIZE).
+    """
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({"success": False, "message": "An import file is required."}), 400
+
+    import_format = detect_format(upload.filename, request.form.get('format'))
+    if not import_format:
+        return jsonify({"success": False, "message": "Import file must be CSV or JSON."}), 400
+
+    batch_size = request.form.get('batch_size', type=int) or current_app.config.get('IMPORT_BATCH_SIZE', 1000)
+    batch_size = max(1, min(batch_size, 10000))
+
+    logger.info("Importing catalog from %s (%s, batch size %s)", upload.filename, import_format, batch_size)
+    rows = iter_csv_rows(upload.stream) if import_format == "csv" else iter_json_rows(upload.stream)
+    try:
+        report = admin_service.import_catalog(rows, batch_size=batch_size)
+    except (ValueError, UnicodeDecodeError) as e:
+        # The file itself could not be parsed; batches before the error stay committed
+        logger.error("Catalog import aborted: %s", e, exc_info=True)
+        return jsonify({"success": False, "message": f"Could not parse import file: {e}"}), 400
+
+    return jsonify({"success": report["failed"] == 0, **report})
+
+
 @admin_bp.route('/admin/get-courses', methods=['GET'])
 @role_required('admin')
 def get_courses():
@@ -324,7 +480,7 @@ def get_courses():
 def admin_logout():
     """Handle admin logout."""
     if current_user.is_authenticated:
-        logger.info(f"Admin logged out: {current_user.email}")
+        logger.info("Admin logged out: %s", current_user.email)
         logout_user()
         flash("You have been logged out successfully.", "success")
     return redirect(url_for('admin.admin_login'))
@@ -1,19 +1,14 @@
 import logging
-from flask import Blueprint, request, render_template
-from app.models import Course
+from flask import Blueprint, request, render_template, jsonify
+from app.services.autocomplete_service import AutocompleteService
 from app.services.public_service import PublicService
+from app.services.search_service import SearchService
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()  # Ensure logs are sent to stdout for CloudWatch
-    ]
-)
 logger = logging.getLogger(__name__)
 
 public_bp = Blueprint('public', __name__)
+search_service = SearchService()
+autocomplete_service = AutocompleteService()
 
 @public_bp.route('/home', methods=['GET'])
 def home():
@@ -24,38 +19,62 @@ def home():
 
 @public_bp.route('/search', methods=['GET', 'POST'])
 def search_courses():
-    """Search for courses based on user input."""
+    """Search for courses based on user input, best matches first."""
     results = None  # Default to None to indicate no search performed yet
-
-    if request.method == 'GET':
-        # Retrieve search parameters from the form
-        name = request.args.get('name')
-        price = request.args.get('price')
-        keywords = request.args.get('query')
-
-        # Build the query dynamically only if at least one parameter exists
-        if name or price or keywords:
-            query = Course.query
-            if name:
-                query = query.filter(Course.name.ilike(f"%{name}%"))
-            if price:
-                query = query.filter(Course.price.ilike(f"%{price}%"))
-            if keywords:
-                query = query.filter(
-                    (Course.name.ilike(f"%{keywords}%")) |
-                    (Course.description.ilike(f"%{keywords}%"))
-                )
-
-            # Execute query and fetch results
-            try:
-                results = query.all()  # Only fetch results if conditions exist
-                logger.info(f"Search results fetched successfully: {len(results)} results found.")
-            except Exception as e:
-                logger.error(f"Error fetching search results: {e}", exc_info=True)
-                results = []
+    page = None
+
+    # Retrieve search parameters from the form
+    name = request.args.get('name')
+    keywords = request.args.get('query')
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    sort = request.args.get('sort', 'relevance')
+    page_number = request.args.get('page', 1, type=int)
+
+    # Only search if at least one parameter exists
+    if request.method == 'GET' and (name or keywords or min_price is not None or max_price is not None):
+        # Course names are indexed alongside descriptions and modules (with the
+        # highest weight), so both inputs feed the same full-text query
+        text_query = " ".join(part for part in (name, keywords) if part)
+        try:
+            page = search_service.search(
+                text_query,
+                min_price=min_price,
+                max_price=max_price,
+                sort=sort,
+                page=page_number
+            )
+            results = page["results"]
+            logger.info("Search results fetched successfully: %s results found.", page['total'])
+        except Exception as e:
+            logger.error("Error fetching search results: %s", e, exc_info=True)
+            results = []
 
     # Pass search parameters to the template
-    return render_template('Search.html', results=results, name=name, price=price, query=keywords)
+    return render_template(
+        'Search.html',
+        results=results,
+        page=page,
+        name=name,
+        query=keywords,
+        min_price=min_price,
+        max_price=max_price,
+        sort=sort
+    )
+
+
+
+@public_bp.route('/search/autocomplete', methods=['GET'])
+def autocomplete_courses():
+    """Return course name suggestions for a prefix or misspelling as JSON."""
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', type=int)
+    try:
+        suggestions = autocomplete_service.suggest(query, limit)
+        return jsonify({"query": query, "suggestions": suggestions})
+    except Exception as e:
+        logger.error("Error fetching autocomplete suggestions: %s", e, exc_info=True)
+        return jsonify({"query": query, "suggestions": []}), 500
 
 
 
@@ -68,10 +87,10 @@ def list_courses():
         if not courses:
             logger.warning("No courses found.")
             return render_template("CourseList.html", courses=[])
-        logger.info(f"Successfully fetched {len(courses)} courses.")
+        logger.info("Successfully fetched %s courses.", len(courses))
         return render_template("CourseList.html", courses=courses)
     except Exception as e:
-        logger.error(f"Error fetching courses: {e}", exc_info=True)
+        logger.error("Error fetching courses: %s", e, exc_info=True)
         return render_template("error.html", error_message="Failed to load courses.")
 
 
@@ -79,7 +98,7 @@ def list_courses():
 @public_bp.route('/courses/<int:course_id>', methods=['GET'])
 def course_detail(course_id):
     """Display details for a specific course."""
-    logger.info(f"Fetching details for course ID: {course_id}")
+    logger.info("Fetching details for course ID: %s", course_id)
     # You can fetch course details by ID here
     return f"Course Detail for {course_id}"
 
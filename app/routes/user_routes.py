@@ -2,22 +2,13 @@ import logging
 
 import app
 from app.models import db, Subscriptions, User, Course
-from app.services.user_service import UserService
+from app.services.user_service import UserService, BOOKED, ALREADY_BOOKED, SOLD_OUT
 from flask import Blueprint, request, render_template, redirect, url_for, flash ,session
 from flask_login import login_user, logout_user, current_user
 
 from app.utils.decorators import role_required
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()  # Ensure logs are sent to stdout for CloudWatch
-    ]
-)
 logger = logging.getLogger(__name__)
 
 error_template = "error.html"
@@ -52,7 +43,7 @@ def login():
                 # Use Flask-Login's login_user instead of session
                 login_user(user)
 
-                logger.info(f"User login successful for email: {email}")
+                logger.info("User login successful for email: %s", email)
 
                 # Redirect based on role
                 if user.role == 'admin':
@@ -63,10 +54,10 @@ def login():
                     session['user_id'] = user.id
                     return redirect(url_for('user.view_bookings'))
             else:
-                logger.warning(f"Login attempt failed for email: {email}")
+                logger.warning("Login attempt failed for email: %s", email)
                 return render_template("UserLogin.html", error="Invalid email or password.")
         except Exception as e:
-            logger.error(f"Error during login process: {e}", exc_info=True)
+            logger.error("Error during login process: %s", e, exc_info=True)
             print('rendering error template:')
             return render_template("error.html", error_message="Unexpected error occurred during login.")
 
@@ -125,17 +116,21 @@ def booking():
         current_user_id = session.get('user_id')
 
         # Call the booking service to book the course
-        booking_successful = user_service.book_course(
+        booking_result = user_service.book_course(
             user_id=current_user_id,
             course_id=course_id,
             special_requests=special_requests
         )
 
         # Flash messages for success or failure
-        if booking_successful:
+        if booking_result == BOOKED:
             flash('Success! Booking confirmed. Go to your profile page to see details.', 'success')
+        elif booking_result == ALREADY_BOOKED:
+            flash('You have already booked this course.', 'error')
+        elif booking_result == SOLD_OUT:
+            flash('Sorry, this course is sold out.', 'error')
         else:
-            flash('This course is already booked or another issue occurred.', 'error')
+            flash('An issue occurred while booking the course. Please try again.', 'error')
 
         # Redirect to user's bookings page after handling the booking
         return redirect(url_for('user.view_bookings'))
@@ -182,13 +177,13 @@ def view_bookings():
         flash('You need to log in to view your bookings.', 'error')
         return redirect(url_for('public.home'))
     
-    # Use the user service to get the user's data and bookings
+    # Use the user service to get the user's profile and bookings (cached, one query on a miss)
     user_service = UserService()
-    user_data = user_service.get_user_data(user_id)  # Assign user_data here
-    bookings = user_service.get_all_bookings(user_id)  # Assign bookings here
+    overview = user_service.get_bookings_overview(user_id)
+    bookings = overview["bookings"] if overview else []
     
     # Check if user_data or bookings is missing
-    if not user_data or not bookings:
+    if not overview or not bookings:
         flash('We could not find your bookings or profile data. Please log in and/or book a course.', 'error')
         return redirect(url_for('public.home'))
     
@@ -283,7 +278,7 @@ def create_user():
 @user_bp.route('/logout')
 def logout():
     if current_user.is_authenticated:
-        logger.info(f"Admin logged out: {current_user.email}")
+        logger.info("Admin logged out: %s", current_user.email)
         logout_user()
         flash("You have been logged out successfully.", "success")
     return redirect(url_for('public.home'))
@@ -294,15 +289,17 @@ def book_course():
     try:
         course_id = int(request.form.get('course_id'))
         user_id = session.get('user_id')
-        success = user_service.book_course(user_id, course_id)
-        if success:
+        result = user_service.book_course(user_id, course_id)
+        if result == BOOKED:
             raise not_implemented
             return f"✅ Course {course_id} successfully booked"
+        elif result == SOLD_OUT:
+            return f"⚠️ Course {course_id} is sold out"
         else:
             return f"⚠️ You’ve already booked Course {course_id}"
 
     except Exception as e:
-        logger.error(f"❌ Error booking course: {e}", exc_info=True)
+        logger.error("❌ Error booking course: %s", e, exc_info=True)
         return render_template(error_template, error_message="Failed to book course."), 500
 
 @user_bp.route('/my-courses')
@@ -315,6 +312,6 @@ def my_courses():
         raise not_implemented
 
     except Exception as e:
-        logger.error(f"❌ Error fetching user courses: {e}", exc_info=True)
+        logger.error("❌ Error fetching user courses: %s", e, exc_info=True)
         return "❌ Failed to retrieve your courses", 500
 
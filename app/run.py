@@ -1,28 +1,21 @@
 import os
 import logging
 from app import create_app
+from app.utils.logging_config import configure_logging
 
-# Set up logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),  # Log to a file
-        logging.StreamHandler()         # Also log to the console
-    ]
-)
 logger = logging.getLogger(__name__)
 
 # Run the Flask App
 if __name__ == "__main__":
+    configure_logging()
+
     # Dynamically load the configuration
     env = os.getenv("FLASK_ENV", "development2")  # Use environment variable or default
-    logger.info(f"Environment set to {env}")
+    logger.info("Environment set to %s", env)
     print(f"Environment variable FLASK_ENV is set to: {env}")
     
-    # Create the Flask app
+    # Create the Flask app (create_app loads the configuration for FLASK_ENV)
     app = create_app()
-    app.config.from_object(config[env])  # Dynamically load configuration based on environment
     
     # Start the Flask application
     logger.info("Starting the Flask app...")
@@ -1,16 +1,44 @@
 # This module contains the service layer for admin-related database operations.
+import csv
+import io
+import json
 import logging
+from collections import Counter
+from datetime import datetime
 from app.models import db, Subscriptions, User, Course, CourseModule, Module
+from app.services.booking_cache import invalidate_course_bookings, invalidate_user_bookings
+from app.services.catalog_service import CatalogService, invalidate_catalog
+from app.services.search_service import SearchService
+from app.services.stats_service import StatsService
+from app.utils.cache import CacheRegion
+from app.utils.importers import RowError
+from app.utils.pagination import clamp_page_size, decode_cursor, encode_cursor
+from sqlalchemy import Integer, String, and_, func, insert, literal, or_, tuple_, type_coerce, update
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_FIELDS = ["booking_id", "user_name", "user_email", "course_name", "status", "subscription_date"]
+
+BOOKING_STATUSES = Subscriptions.status.type.enums
+
+# Orderings for the admin users page, each ending in a unique column
+USER_SORT_OPTIONS = {
+    "name": [User.second_name.asc(), User.first_name.asc(), User.id.asc()],
+    "name_desc": [User.second_name.desc(), User.first_name.desc(), User.id.desc()],
+    "email": [User.email.asc()],
+    "newest": [User.id.desc()],
+    "oldest": [User.id.asc()],
+}
+
+# Customer totals per search term; a slightly stale count is fine for paging
+user_count_cache = CacheRegion("user_counts", maxsize=256, ttl=60)
+
+# Row errors returned in an import report; the counts always cover every row
+MAX_IMPORT_ERRORS = 100
+
 
 class AdminService:
     """Service layer for admin-related database operations."""
@@ -18,123 +46,325 @@ class AdminService:
     def __init__(self, db_session=None):
         """Allow injecting a mock database session for testing."""
         self.db_session = db_session or db.session
+        self.search_service = SearchService(self.db_session)
+        self.stats_service = StatsService(self.db_session)
 
-    def get_all_bookings(self):
-        """Fetch all course bookings with user and course details."""
-        print("Getting bookings from the database...")
-        logger.info("Fetching all bookings from the database...")
-        try:
-            # Use self.db_session instead of db.session
-            bookings = self.db_session.query(
-                Subscriptions.id,
-                User.first_name,
-                User.second_name,
-                User.email,
-                Course.name.label("course_name"),
-                Subscriptions.status,
-                Subscriptions.subscription_date
-            ).join(User, Subscriptions.user_id == User.id) \
-                .join(Course, Subscriptions.course_id == Course.id) \
-                .all()
+    def _bookings_query(self, course_id=None, status=None, date_from=None, date_to=None):
+        """
+        Build the subscription/user/course join shared by the booking listings.
 
-            # Log count instead of full data to avoid exposing sensitive information
-            logger.debug(f"Fetched {len(bookings)} bookings")
-
-            return [
-                {
-                    "booking_id": b.id,
-                    "user_name": f"{b.first_name} {b.second_name}",
-                    "user_email": b.email,
-                    "course_name": b.course_name,
-                    "status": b.status,
-                    "subscription_date": b.subscription_date.strftime("%Y-%m-%d %H:%M:%S")
-                }
-                for b in bookings
-            ]
+        All filters are applied in SQL; date_from is inclusive and date_to exclusive.
+        """
+        query = self.db_session.query(
+            Subscriptions.id,
+            User.first_name,
+            User.second_name,
+            User.email,
+            Course.name.label("course_name"),
+            Subscriptions.status,
+            Subscriptions.subscription_date
+        ).join(User, Subscriptions.user_id == User.id) \
+            .join(Course, Subscriptions.course_id == Course.id)
+
+        if course_id is not None:
+            query = query.filter(Subscriptions.course_id == course_id)
+        if status:
+            query = query.filter(Subscriptions.status == status)
+        if date_from:
+            query = query.filter(Subscriptions.subscription_date >= date_from)
+        if date_to:
+            query = query.filter(Subscriptions.subscription_date < date_to)
+        return query
+
+    @staticmethod
+    def _format_booking(b):
+        """Convert a booking row into the dictionary used by the templates."""
+        return {
+            "booking_id": b.id,
+            "user_name": f"{b.first_name} {b.second_name}",
+            "user_email": b.email,
+            "course_name": b.course_name,
+            "status": b.status,
+            "subscription_date": b.subscription_date.strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def _get_bookings_page(self, course_id=None, cursor=None, direction="next", page_size=None):
+        """
+        Fetch one page of bookings, newest first, using keyset pagination.
+
+        Pages are ordered by (subscription_date, id) descending. The cursor is the
+        position of the last row seen ("next") or the first row seen ("prev"), so
+        each page costs an index range scan regardless of how deep it is.
+
+        :return: Dict with "bookings", "next_cursor" and "prev_cursor".
+        """
+        page_size = clamp_page_size(page_size)
+        position = decode_cursor(cursor)
+
+        stored_date = Subscriptions.subscription_date
+        if self.db_session.get_bind().dialect.name == "sqlite":
+            # SQLite compares the stored text, and CURRENT_TIMESTAMP rows lack the
+            # ".000000" a bound DateTime gets; page on the text exactly as stored
+            stored_date = type_coerce(Subscriptions.subscription_date, String)
+        key = tuple_(stored_date, Subscriptions.id)
+        if position:
+            timestamp, row_id = position
+            if not isinstance(stored_date.type, String):
+                timestamp = datetime.fromisoformat(timestamp)
+            position = tuple_(literal(timestamp, stored_date.type), literal(row_id, Integer))
+
+        query = self._bookings_query(course_id).add_columns(stored_date.label("cursor_date"))
+        if direction == "prev" and position is not None:
+            query = query.filter(key > position) \
+                .order_by(stored_date.asc(), Subscriptions.id.asc())
+        else:
+            direction = "next"
+            if position is not None:
+                query = query.filter(key < position)
+            query = query.order_by(stored_date.desc(), Subscriptions.id.desc())
+
+        # Fetch one extra row to find out whether another page exists
+        rows = query.limit(page_size + 1).all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if direction == "prev":
+            rows.reverse()
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, position is not None
+
+        logger.debug("Fetched %s bookings (direction=%s)", len(rows), direction)
+
+        return {
+            "bookings": [self._format_booking(b) for b in rows],
+            "next_cursor": encode_cursor(rows[-1].cursor_date, rows[-1].id) if rows and has_next else None,
+            "prev_cursor": encode_cursor(rows[0].cursor_date, rows[0].id) if rows and has_prev else None,
+        }
+
+    def get_all_bookings(self, cursor=None, direction="next", page_size=None):
+        """
+        Fetch one page of course bookings with user and course details.
+
+        :param cursor: Opaque cursor from a previous page's next_cursor/prev_cursor.
+        :param direction: "next" for older bookings, "prev" for newer ones.
+        :param page_size: Number of bookings per page (capped at MAX_PAGE_SIZE).
+        :return: Dict with "bookings", "next_cursor" and "prev_cursor".
+        """
+        logger.info("Fetching a page of bookings from the database...")
+        try:
+            return self._get_bookings_page(cursor=cursor, direction=direction, page_size=page_size)
         except Exception as e:
             self.db_session.rollback()  # Add rollback
             logger.error("Failed to fetch bookings", exc_info=True)
             raise RuntimeError("Error fetching bookings from the database.") from e
 
-    def get_all_users(self):
-        """Fetch all users for the admin panel."""
-        logger.info("Fetching all users from the database...")
+    def iter_bookings(self, course_id=None, status=None, date_from=None, date_to=None, chunk_size=1000):
+        """
+        Stream matching bookings without materialising the result.
+
+        Rows are fetched through a server-side cursor in chunks of chunk_size via
+        yield_per, so memory stays flat for internal callers such as exports.
+        """
+        logger.info("Streaming bookings from the database...")
+        query = self._bookings_query(course_id, status, date_from, date_to) \
+            .order_by(Subscriptions.subscription_date.desc(), Subscriptions.id.desc()) \
+            .execution_options(stream_results=True) \
+            .yield_per(chunk_size)
+        try:
+            for b in query:
+                yield self._format_booking(b)
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Failed to stream bookings", exc_info=True)
+            raise RuntimeError("Error streaming bookings from the database.") from e
+
+    def export_bookings(self, export_format="csv", chunk_size=1000, **filters):
+        """
+        Yield bookings serialised as CSV or NDJSON text chunks.
+
+        :param export_format: "csv" or "ndjson".
+        :param chunk_size: Rows fetched per round trip and written per yielded chunk.
+        :param filters: course_id, status, date_from, date_to (see _bookings_query).
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+        if export_format == "csv":
+            writer.writeheader()
+
+        rows = 0
+        for booking in self.iter_bookings(chunk_size=chunk_size, **filters):
+            if export_format == "csv":
+                writer.writerow(booking)
+            else:
+                buffer.write(json.dumps(booking))
+                buffer.write("\n")
+            rows += 1
+
+            if rows % chunk_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        # Flush the final partial chunk (and the CSV header for empty exports)
+        if buffer.tell():
+            yield buffer.getvalue()
+        logger.info("Exported %s bookings as %s.", rows, export_format)
+
+    @staticmethod
+    def _user_search_filter(search):
+        """
+        Build the WHERE clause for a name/email search.
+
+        Every word must be a case-insensitive prefix of the first name, second
+        name or email, which the lower(...) indexes on users can serve.
+        """
+        clauses = []
+        for word in search.lower().split():
+            pattern = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append(or_(
+                func.lower(User.first_name).like(pattern, escape="\\"),
+                func.lower(User.second_name).like(pattern, escape="\\"),
+                func.lower(User.email).like(pattern, escape="\\"),
+            ))
+        return and_(*clauses)
+
+    def count_users(self, search=None):
+        """
+        Count customers matching search, cached for a short time per search term.
+
+        :return: Number of matching customers (possibly up to a minute stale).
+        """
+        key = (search or "").strip().lower()
+        total = user_count_cache.get(key)
+        if total is not None:
+            return total
+
+        query = self.db_session.query(func.count(User.id)).filter(User.role == 'customer')
+        if key:
+            query = query.filter(self._user_search_filter(key))
+        total = query.scalar()
+        user_count_cache.set(key, total)
+        return total
+
+    def get_all_users(self, page=1, page_size=None, sort="name", search=None):
+        """
+        Fetch one page of customers for the admin panel.
+
+        Filtering, sorting and paging all run in SQL; the total comes from
+        count_users, which is cached so paging does not recount the table.
+
+        :param page: 1-based page number.
+        :param page_size: Users per page (clamped to MAX_PAGE_SIZE).
+        :param sort: One of USER_SORT_OPTIONS.
+        :param search: Optional name/email prefix search.
+        :return: Dict with "users", "total", "page", "page_size" and "has_next".
+        """
+        page = max(1, int(page or 1))
+        page_size = clamp_page_size(page_size)
+        if sort not in USER_SORT_OPTIONS:
+            sort = "name"
+        search = (search or "").strip()
+        logger.info("Fetching users page=%s, page_size=%s, sort=%s, search=%r...", page, page_size, sort, search)
         try:
-            # Use self.db_session instead of db.session
-            users = self.db_session.query(
+            query = self.db_session.query(
                 User.id,
                 User.first_name,
                 User.second_name,
                 User.email,
                 User.role
-            ).filter(User.role!='admin').all()
+            ).filter(User.role == 'customer')
+            if search:
+                query = query.filter(self._user_search_filter(search))
+
+            # Fetch one extra row to know whether another page follows
+            users = query.order_by(*USER_SORT_OPTIONS[sort]) \
+                .limit(page_size + 1).offset((page - 1) * page_size).all()
+            has_next = len(users) > page_size
+            users = users[:page_size]
+            total = self.count_users(search)
 
             # Log count instead of full data to avoid exposing sensitive information
-            logger.debug(f"Fetched {len(users)} users")
-
-            # Convert query results to a list of dictionaries
-            return [
-                {
-                    "user_id": u.id,
-                    "full_name": f"{u.first_name} {u.second_name}",
-                    "email": u.email,
-                    "role": u.role
-                }
-                for u in users
-            ]
+            logger.debug("Fetched %s users", len(users))
+
+            return {
+                "users": [
+                    {
+                        "user_id": u.id,
+                        "full_name": f"{u.first_name} {u.second_name}",
+                        "email": u.email,
+                        "role": u.role
+                    }
+                    for u in users
+                ],
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "has_next": has_next,
+            }
         except Exception as e:
             self.db_session.rollback()  # Add rollback
             logger.error("Failed to fetch users", exc_info=True)
             raise RuntimeError("Error fetching users from the database.") from e
 
-    def get_all_course_details(self):
-        """Fetch all courses along with their associated modules."""
-        logger.info("Fetching all course details from the database...")
+    def get_all_course_details(self, sort=None):
+        """
+        Fetch all courses along with their associated modules and booking counts.
+
+        Course and module details come from the cached catalog; the booking
+        counters are read fresh from the courses table (no joins).
+        :param sort: "popular" for most-booked first, otherwise catalog order.
+        """
+        course_details = CatalogService(self.db_session).get_all_course_details()
         try:
-            # Use self.db_session instead of db.session
-            # Query all courses, eagerly loading their modules and module details
-            courses = self.db_session.query(Course).options(
-                joinedload(Course.modules).joinedload(CourseModule.module)
-            ).all()
-
-            # Structure the result as a list of dictionaries for easier consumption
-            course_details = [
-                {
-                    "course_id": course.id,
-                    "course_name": course.name,
-                    "course_description": course.description,
-                    "course_price": course.price,
-                    "modules": [
-                        {
-                            "module_id": module.module.id,
-                            "module_title": module.module.title,
-                            "module_description": module.module.description
-                        }
-                        for module in course.modules
-                    ]
-                }
-                for course in courses
-            ]
-
-            logger.info(f"Successfully fetched details for {len(course_details)} courses.")
-            return course_details
+            counters = {
+                row.id: row
+                for row in self.db_session.query(
+                    Course.id,
+                    Course.bookings_total,
+                    Course.bookings_pending,
+                    Course.bookings_confirmed,
+                    Course.bookings_cancelled
+                )
+            }
         except Exception as e:
-            self.db_session.rollback()  # Add rollback
-            logger.error("Failed to fetch course details", exc_info=True)
-            raise RuntimeError("Error fetching course details from the database.") from e
+            self.db_session.rollback()
+            logger.error("Failed to fetch course booking counters", exc_info=True)
+            raise RuntimeError("Error fetching course booking counters.") from e
+
+        # Copy the shared cached dicts before adding per-request fields
+        courses = []
+        for course in course_details:
+            row = counters.get(course["course_id"])
+            courses.append(dict(
+                course,
+                bookings_total=row.bookings_total if row else 0,
+                bookings_pending=row.bookings_pending if row else 0,
+                bookings_confirmed=row.bookings_confirmed if row else 0,
+                bookings_cancelled=row.bookings_cancelled if row else 0
+            ))
+        if sort == "popular":
+            courses.sort(key=lambda c: c["bookings_total"], reverse=True)
+        return courses
 
     def update_booking_status(self, booking_id, new_status):
         """Update the status of a booking."""
-        logger.info(f"Updating booking status for ID: {booking_id} to {new_status}...")
+        logger.info("Updating booking status for ID: %s to %s...", booking_id, new_status)
         try:
             booking = self.db_session.get(Subscriptions, booking_id)
             if not booking:
-                logger.warning(f"No booking found with ID {booking_id}.")
+                logger.warning("No booking found with ID %s.", booking_id)
                 raise ValueError(f"No booking found for ID: {booking_id}")
 
+            self.stats_service.record_status_change(booking.course_id, booking.status, new_status)
             booking.status = new_status
+            user_id = booking.user_id
             self.db_session.commit()
-            logger.info(f"Booking status updated successfully for ID: {booking_id}.")
+            invalidate_user_bookings(user_id)
+            logger.info("Booking status updated successfully for ID: %s.", booking_id)
             return True
         except ValueError as ve:
             # Re-raise ValueError without rolling back
@@ -144,18 +374,79 @@ class AdminService:
             logger.error("Failed to update booking status", exc_info=True)
             raise RuntimeError("Error updating booking status.") from e
 
+    def update_booking_statuses(self, new_status, booking_ids=None, course_id=None, current_status=None):
+        """
+        Set the status of many bookings with set-based UPDATEs.
+
+        Bookings are selected by booking_ids and/or course_id and current_status.
+        One UPDATE ... RETURNING course_id, user_id runs per possible previous
+        status (at most two), so the exact transitions are known without loading
+        the bookings: course counters are adjusted in the same transaction and
+        the affected users' cached bookings are invalidated after commit.
+
+        :return: Number of bookings whose status changed.
+        :raises ValueError: If the status is invalid or no filter was given.
+        """
+        if new_status not in BOOKING_STATUSES:
+            raise ValueError(f"Invalid booking status: {new_status}")
+        if current_status is not None and current_status not in BOOKING_STATUSES:
+            raise ValueError(f"Invalid booking status: {current_status}")
+        if not booking_ids and course_id is None and current_status is None:
+            raise ValueError("Select bookings by ID, course or current status.")
+
+        logger.info("Batch updating bookings to %s (ids=%s, course_id=%s, current_status=%s)...",
+                    new_status, len(booking_ids or []), course_id, current_status)
+        try:
+            transitions = Counter()
+            user_ids = set()
+            for old_status in BOOKING_STATUSES:
+                if old_status == new_status or current_status not in (None, old_status):
+                    continue
+
+                statement = update(Subscriptions).where(Subscriptions.status == old_status)
+                if booking_ids:
+                    statement = statement.where(Subscriptions.id.in_(booking_ids))
+                if course_id is not None:
+                    statement = statement.where(Subscriptions.course_id == course_id)
+                statement = statement.values(status=new_status) \
+                    .returning(Subscriptions.course_id, Subscriptions.user_id) \
+                    .execution_options(synchronize_session=False)
+
+                for changed_course_id, user_id in self.db_session.execute(statement):
+                    transitions[(changed_course_id, old_status)] += 1
+                    user_ids.add(user_id)
+
+            for (changed_course_id, old_status), count in transitions.items():
+                self.stats_service.record_status_change(changed_course_id, old_status, new_status, count)
+
+            self.db_session.commit()
+            invalidate_user_bookings(*user_ids)
+            updated = sum(transitions.values())
+            logger.info("Batch status update changed %s bookings to %s.", updated, new_status)
+            return updated
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Failed to batch update booking statuses", exc_info=True)
+            raise RuntimeError("Error updating booking statuses.") from e
+
     def delete_booking(self, booking_id):
             """Delete a booking by its ID."""
             try:
                 # Fetch the booking
                 booking = self.get_booking(booking_id)
                 
-                # Delete the booking
+                # Delete the booking and release its seat
+                self.stats_service.record_status_change(
+                    booking.course_id, booking.status, None,
+                    day=booking.subscription_date.date() if booking.subscription_date else None
+                )
+                user_id = booking.user_id
                 self.db_session.delete(booking)
                 self.db_session.commit()
+                invalidate_user_bookings(user_id)
                 
                 # Optional: Log success
-                logger.info(f"Successfully deleted booking with ID: {booking_id}")
+                logger.info("Successfully deleted booking with ID: %s", booking_id)
                 return True
             except ValueError as e:
                 # Handle case where booking is not found
@@ -180,24 +471,29 @@ class AdminService:
 
             # Handle case where booking does not exist
             if not booking:
-                logger.warning(f"Booking with ID {booking_id} not found.")
+                logger.warning("Booking with ID %s not found.", booking_id)
                 raise ValueError(f"Booking with ID {booking_id} not found.")
 
             # Use session.merge() instead of checking is_active
             booking = self.db_session.merge(booking)
 
+            if 'status' in kwargs:
+                self.stats_service.record_status_change(booking.course_id, booking.status, kwargs['status'])
+
             # Update booking attributes
             for key, value in kwargs.items():
                 if hasattr(booking, key):
                     setattr(booking, key, value)
                 else:
-                    logger.warning(f"Attribute '{key}' does not exist on booking and was ignored.")
+                    logger.warning("Attribute '%s' does not exist on booking and was ignored.", key)
 
             # Commit changes to the database
+            user_id = booking.user_id
             self.db_session.commit()
+            invalidate_user_bookings(user_id)
 
             # Log success
-            logger.info(f"Successfully updated booking with ID {booking_id}.")
+            logger.info("Successfully updated booking with ID %s.", booking_id)
             return booking
 
         except ValueError as ve:
@@ -210,27 +506,43 @@ class AdminService:
             logger.error("Failed to update booking", exc_info=True)
             raise RuntimeError("Error updating booking.") from e
 
-    def create_course(self, name, description, price):
-        """Create a new course."""
-        logger.info(f"Creating course: {name}")
+    def create_course(self, name, description, price, capacity=None):
+        """Create a new course; capacity=None means unlimited seats."""
+        logger.info("Creating course: %s", name)
         try:
-            course = Course(name=name, description=description, price=price)
+            course = Course(name=name, description=description, price=price, capacity=capacity)
             self.db_session.add(course)
+            self.db_session.flush()  # Generate the course ID
+            self.search_service.reindex_course(course.id)
             self.db_session.commit()
-            logger.info(f"Course '{name}' created with ID: {course.id}")
+            invalidate_catalog()
+            logger.info("Course '%s' created with ID: %s", name, course.id)
             return course.id
         except Exception as e:
             self.db_session.rollback()  # Add rollback
             logger.error("Failed to create course", exc_info=True)
             raise RuntimeError("Error creating course.") from e
 
-    def update_course(self, course_id, name=None, description=None, price=None):
-        """Update course details."""
-        logger.info(f"Updating course ID {course_id}")
+    def update_course(self, course_id, name=None, description=None, price=None, capacity=None):
+        """
+        Update course details.
+
+        Price and capacity are checked as in validate_course_data(); None leaves
+        a field unchanged and an empty capacity makes the course unlimited.
+        :return: False if the course does not exist, else True.
+        :raises ValueError: If a value is invalid, including a capacity below the seats already booked.
+        """
+        logger.info("Updating course ID %s", course_id)
+        update_capacity = capacity is not None
+        if price is not None:
+            price = self._parse_price(price)
+        if update_capacity:
+            capacity = self._parse_capacity(capacity)
         try:
-            course = self.db_session.get(Course, course_id)
+            # Lock the row so no booking lands between the seat check and the commit
+            course = self.db_session.get(Course, course_id, with_for_update=True)
             if not course:
-                raise ValueError("Course not found.")
+                return False
 
             # Use session.merge() instead of checking is_active
             course = self.db_session.merge(course)
@@ -242,11 +554,22 @@ class AdminService:
                 course.description = description
             if price is not None:
                 course.price = price
-
+            if update_capacity:
+                if capacity is not None and capacity < (course.seats_booked or 0):
+                    raise ValueError(
+                        f"Course capacity cannot be below the {course.seats_booked} seats already booked."
+                    )
+                course.capacity = capacity
+
+            self.db_session.flush()
+            self.search_service.reindex_course(course_id)
             self.db_session.commit()
+            invalidate_catalog()
+            invalidate_course_bookings(course_id)
             return True
-        except ValueError as ve:
-            # Re-raise ValueError without rolling back
+        except ValueError:
+            # Undo any fields already set and release the row lock
+            self.db_session.rollback()
             raise
         except Exception as e:
             self.db_session.rollback()  # Add rollback
@@ -255,7 +578,7 @@ class AdminService:
 
     def delete_course(self, course_id):
         """Delete a course and its module mappings."""
-        logger.info(f"Deleting course ID {course_id}")
+        logger.info("Deleting course ID %s", course_id)
         try:
             course = self.db_session.get(Course, course_id)
             if not course:
@@ -264,10 +587,9 @@ class AdminService:
             # Use session.merge() instead of checking is_active
             course = self.db_session.merge(course)
 
-            # Check for existing subscriptions
-            subscriptions = self.db_session.query(Subscriptions).filter_by(course_id=course_id).first()
-            if subscriptions:
-                logger.warning(f"Cannot delete course ID {course_id} as it has active subscriptions")
+            # Check for existing subscriptions using the maintained counter
+            if course.bookings_total:
+                logger.warning("Cannot delete course ID %s as it has active subscriptions", course_id)
                 raise ValueError("Cannot delete course with active subscriptions")
 
             # Delete CourseModule mappings first
@@ -275,13 +597,15 @@ class AdminService:
 
             # Delete the course
             self.db_session.delete(course)
+            self.search_service.remove_course(course_id)
             self.db_session.commit()
-            logger.info(f"Successfully deleted course ID {course_id}")
+            invalidate_catalog()
+            logger.info("Successfully deleted course ID %s", course_id)
             return True
 
         except ValueError as ve:
             # Handle cases where the course is not found
-            logger.warning(f"Course with ID {course_id} not found: {ve}")
+            logger.warning("Course with ID %s not found: %s", course_id, ve)
             raise
 
         except Exception as e:
@@ -302,14 +626,69 @@ class AdminService:
         except Exception as e:
             # Log the error and re-raise it for debugging purposes
             self.db_session.rollback()  # Add rollback
-            logger.error(f"An error occurred while checking for existing courses: {e}")
+            logger.error("An error occurred while checking for existing courses: %s", e)
             return None
 
+    @staticmethod
+    def validate_course_data(course_data):
+        """
+        Validate and normalise course fields from a form or import row.
+
+        :param course_data: Dictionary with name, description, price and capacity (strings or numbers).
+        :return: Dictionary ready for Course(**data).
+        :raises ValueError: If a field is missing or invalid.
+        """
+        name = (course_data.get('name') or '').strip()
+        if not name:
+            raise ValueError("Course name is required.")
+
+        return {
+            'name': name,
+            'description': (course_data.get('description') or '').strip() or None,
+            'price': AdminService._parse_price(course_data.get('price')),
+            'capacity': AdminService._parse_capacity(course_data.get('capacity'))
+        }
+
+    @staticmethod
+    def _parse_price(price):
+        """Empty means free; otherwise a non-negative number."""
+        try:
+            price = float(price) if price not in (None, '') else 0.0
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid course price: {price!r}")
+        if price < 0:
+            raise ValueError("Course price cannot be negative.")
+        return price
+
+    @staticmethod
+    def _parse_capacity(capacity):
+        """Empty means unlimited (None); otherwise a whole number of at least 1."""
+        try:
+            capacity = int(capacity) if capacity not in (None, '') else None
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid course capacity: {capacity!r}")
+        if capacity is not None and capacity < 1:
+            raise ValueError("Course capacity must be at least 1.")
+        return capacity
+
+    @staticmethod
+    def validate_module_data(module):
+        """
+        Validate and normalise module fields from a form or import row.
+
+        :return: Dictionary with title and description.
+        :raises ValueError: If the title is missing.
+        """
+        title = (module.get('title') or '').strip()
+        if not title:
+            raise ValueError("Module title is required.")
+        return {'title': title, 'description': (module.get('description') or '').strip() or None}
+
     def add_course(self, course_data):
         """
         Add a new course to the database.
 
-        :param course_data: Dictionary with course details (e.g., name, description, price).
+        :param course_data: Dictionary with course details (e.g., name, description, price, capacity).
         :return: The created course ID if successful, None otherwise.
         """
         try:
@@ -319,23 +698,50 @@ class AdminService:
             new_course = Course(
                 name=course_data['name'],
                 description=course_data.get('description'),
-                price=course_data['price']
+                price=course_data['price'],
+                capacity=course_data.get('capacity')
             )
             self.db_session.add(new_course)
             self.db_session.flush()  # Generate the course ID
-            logger.info(f"Course added: ID={new_course.id}, Name={new_course.name}")
+            logger.info("Course added: ID=%s, Name=%s", new_course.id, new_course.name)
+            self.search_service.reindex_course(new_course.id)
 
             # Commit the course
             self.db_session.commit()
+            invalidate_catalog()
             logger.info("Course committed successfully.")
             return new_course.id
 
         except Exception as e:
-            logger.error(f"Error occurred while adding course: {str(e)}", exc_info=True)
+            logger.error("Error occurred while adding course: %s", str(e), exc_info=True)
             self.db_session.rollback()
             logger.info("Database changes rolled back.")
             return None
 
+    def _insert_modules(self, course_id, module_data):
+        """
+        Bulk insert modules and their CourseModule mappings for one course.
+
+        Modules go in as a single multi-row INSERT ... RETURNING id, and the mappings
+        as one executemany INSERT, inside the caller's transaction.
+        :return: List of the new module IDs.
+        """
+        if not module_data:
+            return []
+
+        # Every module maps to the same course, so RETURNING order does not matter
+        # and the statement can stay a single multi-row INSERT on every backend
+        module_ids = self.db_session.scalars(
+            insert(Module).returning(Module.id),
+            [{"title": module['title'], "description": module.get('description')} for module in module_data]
+        ).all()
+
+        self.db_session.execute(
+            insert(CourseModule),
+            [{"course_id": course_id, "module_id": module_id} for module_id in module_ids]
+        )
+        return module_ids
+
     def add_modules_to_course(self, course_id, module_data):
         """
         Add modules to an existing course.
@@ -345,82 +751,164 @@ class AdminService:
         :return: True if the operation was successful, False otherwise.
         """
         try:
-            logger.info(f"Starting to add modules to course ID: {course_id}")
+            logger.info("Starting to add %s modules to course ID: %s", len(module_data), course_id)
+            course_id = int(course_id)
 
             # Check if the course exists - use self.db_session
-            course = self.db_session.query(Course).get(course_id)
+            course = self.db_session.get(Course, course_id)
             if not course:
-                logger.warning(f"Course with ID={course_id} not found.")
+                logger.warning("Course with ID=%s not found.", course_id)
                 return False
 
-            # Add each module and create CourseModule mappings
-            for module in module_data:
-                new_module = Module(
-                    title=module['title'],
-                    description=module.get('description')
-                )
-                self.db_session.add(new_module)
-                self.db_session.flush()  # Generate the module ID
-                logger.info(f"Module added: ID={new_module.id}, Title={new_module.title}")
+            module_ids = self._insert_modules(course_id, module_data)
+            logger.info("Added modules %s and their mappings to course ID %s", module_ids, course_id)
 
-                # Create CourseModule mapping
-                course_module_mapping = CourseModule(course_id=course_id, module_id=new_module.id)
-                self.db_session.add(course_module_mapping)
-                logger.info(f"CourseModule mapping created: CourseID={course_id}, ModuleID={new_module.id}")
+            # Refresh the course's search document with the new module text
+            self.search_service.reindex_course(course_id)
 
             # Commit all changes
             self.db_session.commit()
+            invalidate_catalog()
             logger.info("Modules committed successfully.")
             return True
 
         except Exception as e:
-            logger.error(f"Error occurred while adding modules: {str(e)}", exc_info=True)
+            logger.error("Error occurred while adding modules: %s", str(e), exc_info=True)
             self.db_session.rollback()
             logger.info("Database changes rolled back.")
             return False
 
-    def get_bookings_by_course(self, course_id):
+    def import_catalog(self, rows, batch_size=1000):
         """
-        Fetch bookings for a specific course with user and course details.
+        Import courses and modules from an iterable of rows in batched transactions.
+
+        Each row describes one module of a course, using the keys course_name,
+        course_description, course_price, course_capacity, module_title and
+        module_description. A row without module_title only ensures the course
+        exists. Courses are matched by name, so modules for an existing course are
+        appended to it. Rows are consumed lazily, so a streamed upload never needs
+        to be held in memory.
+
+        :param rows: Iterable of dictionaries (e.g. from app.utils.importers).
+        :param batch_size: Rows committed per transaction.
+        :return: Dict with succeeded/failed row counts, created counts and the first errors.
+        """
+        report = {
+            "succeeded": 0,
+            "failed": 0,
+            "courses_created": 0,
+            "modules_created": 0,
+            "errors": []
+        }
+        course_ids = {}  # Course name -> ID, remembered across batches
+        batch = []
+
+        def record_error(row_number, message):
+            report["failed"] += 1
+            if len(report["errors"]) < MAX_IMPORT_ERRORS:
+                report["errors"].append({"row": row_number, "error": message})
+
+        for row_number, row in enumerate(rows, start=1):
+            if isinstance(row, RowError):
+                record_error(row_number, str(row))
+                continue
+            try:
+                course = self.validate_course_data({
+                    'name': row.get('course_name'),
+                    'description': row.get('course_description'),
+                    'price': row.get('course_price'),
+                    'capacity': row.get('course_capacity')
+                })
+                module = None
+                if (row.get('module_title') or '').strip():
+                    module = self.validate_module_data({
+                        'title': row.get('module_title'),
+                        'description': row.get('module_description')
+                    })
+            except (ValueError, AttributeError) as e:
+                record_error(row_number, str(e))
+                continue
+
+            batch.append((row_number, course, module))
+            if len(batch) >= batch_size:
+                self._import_batch(batch, course_ids, report, record_error)
+                batch = []
+
+        if batch:
+            self._import_batch(batch, course_ids, report, record_error)
+
+        invalidate_catalog()
+        logger.info("Catalog import finished: %s rows imported, %s failed.", report['succeeded'], report['failed'])
+        return report
+
+    def _import_batch(self, batch, course_ids, report, record_error):
+        """Write one batch of validated import rows in a single transaction."""
+        try:
+            # Resolve course names not seen in earlier batches against the database
+            unknown = {course['name'] for _, course, _ in batch} - course_ids.keys()
+            if unknown:
+                existing = self.db_session.query(Course.id, Course.name) \
+                    .filter(Course.name.in_(unknown)).all()
+                new_course_ids = {c.name: c.id for c in existing}
+            else:
+                new_course_ids = {}
+
+            # Create the courses that do not exist yet (first row's details win)
+            to_create = {}
+            for _, course, _ in batch:
+                name = course['name']
+                if name not in course_ids and name not in new_course_ids:
+                    to_create.setdefault(name, course)
+            for name, course in to_create.items():
+                new_course_ids[name] = self.db_session.scalar(insert(Course).values(**course).returning(Course.id))
+
+            # Group modules by course so each course gets one bulk insert
+            modules_by_course = {}
+            ids = {**course_ids, **new_course_ids}
+            for _, course, module in batch:
+                if module:
+                    modules_by_course.setdefault(ids[course['name']], []).append(module)
+
+            module_count = 0
+            for course_id, modules in modules_by_course.items():
+                module_count += len(self._insert_modules(course_id, modules))
+
+            touched = set(modules_by_course) | {new_course_ids[name] for name in to_create}
+            for course_id in touched:
+                self.search_service.reindex_course(course_id)
 
-        :param course_id: ID of the course to filter bookings by.
-        :return: List of bookings for the specified course.
+            self.db_session.commit()
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Import batch of %s rows failed: %s", len(batch), e, exc_info=True)
+            for row_number, _, _ in batch:
+                record_error(row_number, "Database error while importing this batch.")
+            return
+
+        course_ids.update(new_course_ids)
+        report["succeeded"] += len(batch)
+        report["courses_created"] += len(to_create)
+        report["modules_created"] += module_count
+        invalidate_catalog()
+        logger.info("Imported batch of %s rows (%s courses, %s modules).", len(batch), len(to_create), module_count)
+
+    def get_bookings_by_course(self, course_id, cursor=None, direction="next", page_size=None):
         """
-        print(f"Getting bookings for Course ID {course_id}...")
-        logger.info(f"Fetching bookings for Course ID {course_id} from the database...")
+        Fetch one page of bookings for a specific course with user and course details.
 
+        :param course_id: ID of the course to filter bookings by.
+        :param cursor: Opaque cursor from a previous page's next_cursor/prev_cursor.
+        :param direction: "next" for older bookings, "prev" for newer ones.
+        :param page_size: Number of bookings per page (capped at MAX_PAGE_SIZE).
+        :return: Dict with "bookings", "next_cursor" and "prev_cursor".
+        """
+        logger.info("Fetching a page of bookings for Course ID %s from the database...", course_id)
         try:
-            # Use self.db_session instead of db.session
-            bookings = self.db_session.query(
-                Subscriptions.id,
-                User.first_name,
-                User.second_name,
-                User.email,
-                Course.name.label("course_name"),
-                Subscriptions.status,
-                Subscriptions.subscription_date
-            ).join(User, Subscriptions.user_id == User.id) \
-                .join(Course, Subscriptions.course_id == Course.id) \
-                .filter(Subscriptions.course_id == course_id) \
-                .all()
-
-            # Log count instead of full data
-            logger.debug(f"Fetched {len(bookings)} bookings for Course ID {course_id}")
-
-            return [
-                {
-                    "booking_id": b.id,
-                    "user_name": f"{b.first_name} {b.second_name}",
-                    "user_email": b.email,
-                    "course_name": b.course_name,
-                    "status": b.status,
-                    "subscription_date": b.subscription_date.strftime("%Y-%m-%d %H:%M:%S")
-                }
-                for b in bookings
-            ]
+            return self._get_bookings_page(course_id=course_id, cursor=cursor,
+                                           direction=direction, page_size=page_size)
         except Exception as e:
             self.db_session.rollback()  # Add rollback
-            logger.error(f"Failed to fetch bookings for Course ID {course_id}", exc_info=True)
+            logger.error("Failed to fetch bookings for Course ID %s", course_id, exc_info=True)
             raise RuntimeError(f"Error fetching bookings for Course ID {course_id} from the database.") from e
 
     def get_all_courses(self):
@@ -437,11 +925,11 @@ class AdminService:
 
         except SQLAlchemyError as e:
             self.db_session.rollback()  # Add rollback
-            logger.error(f"Database error while fetching courses: {e}", exc_info=True)
+            logger.error("Database error while fetching courses: %s", e, exc_info=True)
             return []
         except Exception as e:
             self.db_session.rollback()  # Add rollback
-            logger.error(f"Unexpected error: {e}", exc_info=True)
+            logger.error("Unexpected error: %s", e, exc_info=True)
             return []
 
 
@@ -0,0 +1,113 @@
+# This module contains the in-memory course name autocomplete index.
+import logging
+import re
+from collections import defaultdict
+from app.models import db, Course
+from app.services.catalog_service import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+# Stored next to the catalog so invalidate_catalog() also drops the index
+NAME_INDEX_KEY = "course_name_index"
+
+DEFAULT_SUGGESTIONS = 8
+MAX_SUGGESTIONS = 25
+MIN_SIMILARITY = 0.2
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def trigrams(value):
+    """Return the set of trigrams of value, padding each word like pg_trgm does."""
+    grams = set()
+    for word in _WORD_RE.findall(value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class CourseNameIndex:
+    """Prefix and trigram index over course names for typo-tolerant suggestions."""
+
+    def __init__(self, courses):
+        """
+        :param courses: Iterable of (course_id, name) pairs.
+        """
+        self.names = {}
+        self.words = {}
+        self.postings = defaultdict(set)
+
+        for course_id, name in courses:
+            self.names[course_id] = name
+            # Keep per-word trigram sets so a typo is compared with the closest word
+            self.words[course_id] = [(word, trigrams(word)) for word in _WORD_RE.findall(name.lower())]
+            for gram in trigrams(name):
+                self.postings[gram].add(course_id)
+
+    def suggest(self, query, limit=DEFAULT_SUGGESTIONS):
+        """
+        Rank course names for a partial or misspelled query.
+
+        Names with a word starting with the query's last word come first, then
+        names ordered by word similarity (mean over query words of the best
+        trigram Jaccard score against any name word), shortest names first on ties.
+        """
+        query_words = [(word, trigrams(word)) for word in _WORD_RE.findall((query or "").lower())]
+        if not query_words:
+            return []
+        prefix = query_words[-1][0]
+
+        # Only names sharing at least one trigram with the query are candidates
+        candidates = set()
+        for _, grams in query_words:
+            for gram in grams:
+                candidates.update(self.postings.get(gram, ()))
+
+        scored = []
+        for course_id in candidates:
+            words = self.words[course_id]
+            is_prefix = any(word.startswith(prefix) for word, _ in words)
+            similarity = sum(
+                max(len(grams & word_grams) / len(grams | word_grams) for _, word_grams in words)
+                for _, grams in query_words
+            ) / len(query_words)
+            if is_prefix or similarity >= MIN_SIMILARITY:
+                scored.append((not is_prefix, -similarity, len(self.names[course_id]), course_id))
+
+        scored.sort()
+        return [
+            {"id": course_id, "name": self.names[course_id]}
+            for _, _, _, course_id in scored[:limit]
+        ]
+
+
+class AutocompleteService:
+    """Serves course name suggestions from an index cached alongside the catalog."""
+
+    def __init__(self, db_session=None):
+        """Allow injecting a mock database session for testing."""
+        self.db_session = db_session or db.session
+
+    def get_index(self):
+        """Return the cached name index, building it from the courses table on a miss."""
+        index = catalog_cache.get(NAME_INDEX_KEY)
+        if index is not None:
+            return index
+
+        logger.info("Building course name autocomplete index...")
+        try:
+            courses = self.db_session.query(Course.id, Course.name).all()
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Failed to build course name index", exc_info=True)
+            raise RuntimeError("Error building course name index.") from e
+
+        index = CourseNameIndex(courses)
+        catalog_cache.set(NAME_INDEX_KEY, index)
+        logger.info("Indexed %s course names for autocomplete.", len(courses))
+        return index
+
+    def suggest(self, query, limit=DEFAULT_SUGGESTIONS):
+        """Return up to limit {"id", "name"} suggestions for a prefix or misspelling."""
+        limit = max(1, min(int(limit or DEFAULT_SUGGESTIONS), MAX_SUGGESTIONS))
+        return self.get_index().suggest(query, limit)
@@ -0,0 +1,35 @@
+# This module contains the per-user cache of the "my bookings" projection.
+import logging
+from app.utils.cache import CacheRegion
+
+logger = logging.getLogger(__name__)
+
+# Keyed by user id, on the configured cache backend. Entries are tagged with
+# course_tag() of every booked course so course edits invalidate them too.
+bookings_cache = CacheRegion("user_bookings", maxsize=10000, ttl=300)
+
+
+def course_tag(course_id):
+    """Tag attached to cached bookings that include course_id."""
+    return f"course:{int(course_id)}"
+
+
+def init_bookings_cache(app):
+    """Apply the user bookings cache settings from the app config."""
+    bookings_cache.configure(
+        maxsize=app.config.get("USER_BOOKINGS_CACHE_MAXSIZE", 10000),
+        ttl=app.config.get("USER_BOOKINGS_CACHE_TTL", 300),
+    )
+
+
+def invalidate_user_bookings(*user_ids):
+    """Drop the cached bookings of the given users so their next view reloads them."""
+    for user_id in user_ids:
+        logger.info("Invalidating cached bookings for user ID: %s", user_id)
+        bookings_cache.delete(int(user_id))
+
+
+def invalidate_course_bookings(course_id):
+    """Drop the cached bookings of every user booked on course_id (e.g. after a rename)."""
+    logger.info("Invalidating cached bookings for course ID: %s", course_id)
+    bookings_cache.invalidate_tags(course_tag(course_id))
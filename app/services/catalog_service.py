@@ -0,0 +1,80 @@
+# This module contains the shared, cached course catalog used by all services.
+import logging
+from app.models import db, Course, CourseModule
+from app.utils.cache import CacheRegion
+from sqlalchemy.orm import joinedload
+
+logger = logging.getLogger(__name__)
+
+CATALOG_KEY = "course_catalog"
+
+# Shared by PublicService, UserService and AdminService on the configured cache backend
+catalog_cache = CacheRegion("catalog", maxsize=128, ttl=300)
+
+
+def init_catalog_cache(app):
+    """Apply the catalog cache settings from the app config."""
+    catalog_cache.configure(
+        maxsize=app.config.get("CATALOG_CACHE_MAXSIZE", 128),
+        ttl=app.config.get("CATALOG_CACHE_TTL", 300),
+    )
+
+
+def invalidate_catalog():
+    """Drop the cached catalog so the next read goes to the database."""
+    logger.info("Invalidating course catalog cache.")
+    catalog_cache.clear()
+
+
+class CatalogService:
+    """Read-through cache over the course/module catalog."""
+
+    def __init__(self, db_session=None):
+        """Allow injecting a mock database session for testing."""
+        self.db_session = db_session or db.session
+
+    def get_all_course_details(self):
+        """
+        Fetch all courses along with their associated modules.
+
+        Served from the in-process cache when possible. The returned list is
+        shared between callers and must be treated as read-only.
+        """
+        course_details = catalog_cache.get(CATALOG_KEY)
+        if course_details is not None:
+            logger.debug("Course catalog served from cache.")
+            return course_details
+
+        logger.info("Fetching all course details from the database...")
+        try:
+            # Query all courses, eagerly loading their modules and module details
+            courses = self.db_session.query(Course).options(
+                joinedload(Course.modules).joinedload(CourseModule.module)
+            ).all()
+
+            # Structure the result as a list of dictionaries for easier consumption
+            course_details = [
+                {
+                    "course_id": course.id,
+                    "course_name": course.name,
+                    "course_description": course.description,
+                    "course_price": course.price,
+                    "modules": [
+                        {
+                            "module_id": module.module.id,
+                            "module_title": module.module.title,
+                            "module_description": module.module.description
+                        }
+                        for module in course.modules
+                    ]
+                }
+                for course in courses
+            ]
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Failed to fetch course details", exc_info=True)
+            raise RuntimeError("Error fetching course details from the database.") from e
+
+        catalog_cache.set(CATALOG_KEY, course_details)
+        logger.info("Successfully fetched details for %s courses.", len(course_details))
+        return course_details
@@ -0,0 +1,276 @@
+# This module contains the ranked full-text course search.
+import logging
+import re
+from app.models import db, Course
+from sqlalchemy import and_, column, func, literal_column, or_, select, table, text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# Non-relevance orderings; "relevance" is resolved per backend at query time
+SORT_OPTIONS = {
+    "relevance": None,
+    "price_asc": [Course.price.asc()],
+    "price_desc": [Course.price.desc()],
+    "name": [Course.name.asc()],
+    "newest": [Course.id.desc()],
+    "popular": [Course.bookings_total.desc()],
+}
+
+# Only word characters reach the full-text engines; everything else is a separator
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Concatenated module titles/descriptions of one course, shared by both backends
+_MODULE_TEXT_SQL = (
+    "SELECT {agg}(m.title || ' ' || coalesce(m.description, ''), ' ') "
+    "FROM course_modules cm JOIN modules m ON m.id = cm.module_id "
+    "WHERE cm.course_id = c.id"
+)
+
+
+def search_terms(raw):
+    """Split user input into the lowercase words used to build full-text queries."""
+    return [word.lower() for word in _WORD_RE.findall(raw or "")]
+
+
+class _PostgresSearchBackend:
+    """tsvector column on courses with a GIN index, ranked with ts_rank_cd."""
+
+    vector = literal_column("courses.search_vector")
+
+    _UPDATE_SQL = (
+        "UPDATE courses c SET search_vector = "
+        "setweight(to_tsvector('english', coalesce(c.name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(c.description, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce((" + _MODULE_TEXT_SQL.format(agg="string_agg") + "), '')), 'C')"
+    )
+
+    def __init__(self, db_session):
+        self.db_session = db_session
+
+    def ensure_schema(self):
+        self.db_session.execute(text("ALTER TABLE courses ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+        self.db_session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_courses_search_vector ON courses USING GIN (search_vector)"
+        ))
+        # Backfill rows created before the column existed
+        self.db_session.execute(text(self._UPDATE_SQL + " WHERE c.search_vector IS NULL"))
+
+    def reindex_course(self, course_id):
+        self.db_session.execute(text(self._UPDATE_SQL + " WHERE c.id = :course_id"), {"course_id": course_id})
+
+    def remove_course(self, course_id):
+        # The vector lives on the course row and is deleted with it
+        pass
+
+    def reindex_all(self):
+        self.db_session.execute(text(self._UPDATE_SQL))
+
+    def match(self, terms):
+        """Return (from_clause, where_clause or None, rank_expression, rank_descending)."""
+        tsquery = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+        rank = func.ts_rank_cd(self.vector, tsquery)
+        return Course.__table__, self.vector.op("@@")(tsquery), rank, True
+
+
+class _SQLiteSearchBackend:
+    """FTS5 shadow table keyed by course id, ranked with bm25."""
+
+    fts = table("course_search", column("rowid"))
+
+    _INSERT_SQL = (
+        "INSERT INTO course_search (rowid, name, description, modules) "
+        "SELECT c.id, c.name, coalesce(c.description, ''), "
+        "coalesce((" + _MODULE_TEXT_SQL.format(agg="group_concat") + "), '') "
+        "FROM courses c"
+    )
+
+    def __init__(self, db_session):
+        self.db_session = db_session
+
+    def ensure_schema(self):
+        exists = self.db_session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'course_search'"
+        )).first()
+        if exists:
+            return
+        self.db_session.execute(text(
+            "CREATE VIRTUAL TABLE course_search "
+            "USING fts5(name, description, modules, tokenize = 'porter unicode61')"
+        ))
+        self.reindex_all()
+
+    def reindex_course(self, course_id):
+        self.remove_course(course_id)
+        self.db_session.execute(text(self._INSERT_SQL + " WHERE c.id = :course_id"), {"course_id": course_id})
+
+    def remove_course(self, course_id):
+        self.db_session.execute(text("DELETE FROM course_search WHERE rowid = :course_id"), {"course_id": course_id})
+
+    def reindex_all(self):
+        self.db_session.execute(text("DELETE FROM course_search"))
+        self.db_session.execute(text(self._INSERT_SQL))
+
+    def match(self, terms):
+        """Return (from_clause, where_clause or None, rank_expression, rank_descending)."""
+        fts_query = " ".join(f'"{term}"*' for term in terms)
+        # FTS5 auxiliary functions such as bm25 cannot be evaluated next to window
+        # functions, so rank inside a derived table and join courses onto it.
+        # Column weights: name, description, module text. bm25 is lower-is-better.
+        matches = select(
+            self.fts.c.rowid.label("course_id"),
+            literal_column("bm25(course_search, 10.0, 4.0, 2.0)").label("rank"),
+        ).select_from(self.fts) \
+            .where(text("course_search MATCH :fts_query").bindparams(fts_query=fts_query)) \
+            .subquery("matches")
+        from_clause = matches.join(Course.__table__, Course.id == matches.c.course_id)
+        return from_clause, None, matches.c.rank, False
+
+
+class _LikeSearchBackend:
+    """Fallback for databases without a supported full-text engine."""
+
+    def __init__(self, db_session):
+        self.db_session = db_session
+
+    def ensure_schema(self):
+        pass
+
+    def reindex_course(self, course_id):
+        pass
+
+    def remove_course(self, course_id):
+        pass
+
+    def reindex_all(self):
+        pass
+
+    def match(self, terms):
+        """Return (from_clause, where_clause or None, rank_expression, rank_descending)."""
+        where = and_(*[
+            or_(Course.name.ilike(f"%{term}%"), Course.description.ilike(f"%{term}%"))
+            for term in terms
+        ])
+        return Course.__table__, where, Course.name, False
+
+
+_BACKENDS = {
+    "postgresql": _PostgresSearchBackend,
+    "sqlite": _SQLiteSearchBackend,
+}
+
+
+class SearchService:
+    """Ranked, paginated full-text search over course names, descriptions and modules."""
+
+    def __init__(self, db_session=None):
+        """Allow injecting a mock database session for testing."""
+        self.db_session = db_session or db.session
+
+    @property
+    def backend(self):
+        dialect = self.db_session.get_bind().dialect.name
+        return _BACKENDS.get(dialect, _LikeSearchBackend)(self.db_session)
+
+    def ensure_schema(self):
+        """Create the search index structures if missing and backfill them."""
+        logger.info("Ensuring course search index exists...")
+        try:
+            self.backend.ensure_schema()
+            self.db_session.commit()
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Failed to create course search index", exc_info=True)
+            raise RuntimeError("Error creating course search index.") from e
+
+    def reindex_course(self, course_id):
+        """
+        Refresh the search document of one course.
+
+        Runs inside the caller's transaction so the index commits together with
+        the course/module change that triggered it.
+        """
+        self.backend.reindex_course(course_id)
+
+    def remove_course(self, course_id):
+        """Drop a course from the search index (inside the caller's transaction)."""
+        self.backend.remove_course(course_id)
+
+    def reindex_all(self):
+        """Rebuild the search documents of every course."""
+        logger.info("Rebuilding course search index...")
+        try:
+            self.backend.reindex_all()
+            self.db_session.commit()
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Failed to rebuild course search index", exc_info=True)
+            raise RuntimeError("Error rebuilding course search index.") from e
+
+    def search(self, keywords=None, min_price=None, max_price=None, sort="relevance",
+               page=1, page_size=DEFAULT_SEARCH_PAGE_SIZE):
+        """
+        Search courses, best matches first unless another sort is requested.
+
+        Price bounds and sorting are applied in SQL (backed by ix_courses_price) and
+        the total match count comes from a window function in the same query.
+
+        :param keywords: Free text matched against names, descriptions and module text.
+        :param min_price: Optional inclusive lower price bound.
+        :param max_price: Optional inclusive upper price bound.
+        :param sort: One of SORT_OPTIONS; "relevance" falls back to name without keywords.
+        :param page: 1-based page number.
+        :param page_size: Results per page (capped at MAX_SEARCH_PAGE_SIZE).
+        :return: Dict with "results" (list of course dicts), "total", "page", "page_size" and "has_next".
+        """
+        page = max(1, int(page or 1))
+        page_size = max(1, min(int(page_size or DEFAULT_SEARCH_PAGE_SIZE), MAX_SEARCH_PAGE_SIZE))
+        if sort not in SORT_OPTIONS:
+            sort = "relevance"
+        terms = search_terms(keywords)
+        logger.info("Searching courses for terms=%s, price=[%s, %s], sort=%s, page=%s",
+                    terms, min_price, max_price, sort, page)
+
+        columns = [
+            Course.id, Course.name, Course.description, Course.price,
+            func.count().over().label("total_count"),
+        ]
+        if terms:
+            from_clause, where, rank, rank_descending = self.backend.match(terms)
+            query = select(*columns).select_from(from_clause)
+            if where is not None:
+                query = query.where(where)
+            relevance = [rank.desc() if rank_descending else rank.asc()]
+        else:
+            query = select(*columns)
+            relevance = [Course.name]
+
+        if min_price is not None:
+            query = query.where(Course.price >= min_price)
+        if max_price is not None:
+            query = query.where(Course.price <= max_price)
+
+        order_by = relevance if sort == "relevance" else SORT_OPTIONS[sort]
+        query = query.order_by(*order_by, Course.id) \
+            .limit(page_size).offset((page - 1) * page_size)
+
+        try:
+            rows = self.db_session.execute(query).all()
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Failed to search courses", exc_info=True)
+            raise RuntimeError("Error searching courses.") from e
+
+        total = rows[0].total_count if rows else 0
+        return {
+            "results": [
+                {"id": r.id, "name": r.name, "description": r.description, "price": r.price}
+                for r in rows
+            ],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "has_next": page * page_size < total,
+        }
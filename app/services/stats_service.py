@@ -0,0 +1,212 @@
+# This module contains the denormalized booking counters and the admin dashboard statistics.
+import logging
+from datetime import datetime, timedelta
+from app.models import db, Course, DailyBookingStats, Subscriptions
+from app.utils.dialects import upsert_insert
+from sqlalchemy import case, delete, func, insert, select, update
+
+logger = logging.getLogger(__name__)
+
+# Days of bookings shown on the dashboard
+DASHBOARD_DAYS = 30
+
+# Course counter column maintained for each booking status
+STATUS_COUNTERS = {
+    "pending": "bookings_pending",
+    "confirmed": "bookings_confirmed",
+    "cancelled": "bookings_cancelled",
+}
+
+
+class StatsService:
+    """
+    Keeps the booking counters on courses and the daily totals in step with subscriptions.
+
+    The record_* methods run inside the caller's transaction, so the counters
+    commit or roll back together with the booking change that moved them.
+    """
+
+    def __init__(self, db_session=None):
+        """Allow injecting a mock database session for testing."""
+        self.db_session = db_session or db.session
+
+    @staticmethod
+    def counter_values(old_status, new_status, count=1):
+        """
+        Build the Course column increments for count bookings changing status.
+
+        Pass old_status=None for new bookings and new_status=None for deleted
+        ones. seats_booked follows bookings entering or leaving 'cancelled'.
+        :return: Dict of Course column name to in-database increment expression.
+        """
+        deltas = {}
+        if old_status is not None:
+            deltas[STATUS_COUNTERS[old_status]] = -count
+        if new_status is not None:
+            deltas[STATUS_COUNTERS[new_status]] = deltas.get(STATUS_COUNTERS[new_status], 0) + count
+        if old_status is None or new_status is None:
+            deltas["bookings_total"] = count if old_status is None else -count
+
+        held_before = old_status not in (None, "cancelled")
+        held_after = new_status not in (None, "cancelled")
+        if held_before != held_after:
+            deltas["seats_booked"] = count if held_after else -count
+
+        return {
+            name: getattr(Course, name) + delta
+            for name, delta in deltas.items() if delta
+        }
+
+    def record_status_change(self, course_id, old_status, new_status, count=1, day=None):
+        """
+        Move count bookings of a course from old_status to new_status.
+
+        One atomic UPDATE adjusts the course counters. Re-activating a cancelled
+        booking is an admin override and is not capped by capacity. New and
+        deleted bookings also adjust the per-day totals for day (default: today, UTC).
+        """
+        if old_status == new_status:
+            return
+
+        self.db_session.execute(
+            update(Course)
+            .where(Course.id == course_id)
+            .values(**self.counter_values(old_status, new_status, count))
+            .execution_options(synchronize_session=False)
+        )
+        if old_status is None or new_status is None:
+            self.record_daily_bookings(day, count if old_status is None else -count)
+
+    def record_daily_bookings(self, day=None, count=1):
+        """Add count (which may be negative) to the bookings made on day."""
+        day = day or datetime.utcnow().date()
+        upsert = upsert_insert(self.db_session, DailyBookingStats)
+        if upsert is not None:
+            statement = upsert.values(day=day, bookings=count)
+            self.db_session.execute(statement.on_conflict_do_update(
+                index_elements=["day"],
+                set_={"bookings": DailyBookingStats.bookings + statement.excluded.bookings}
+            ))
+            return
+
+        # No ON CONFLICT support: update, and insert the row if it does not exist yet
+        updated = self.db_session.execute(
+            update(DailyBookingStats)
+            .where(DailyBookingStats.day == day)
+            .values(bookings=DailyBookingStats.bookings + count)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            self.db_session.execute(insert(DailyBookingStats).values(day=day, bookings=count))
+
+    def rebuild_counters(self):
+        """
+        Recompute every booking counter and daily total from subscriptions.
+
+        Repair job for counters that drifted (e.g. after manual SQL). Course rows
+        are locked first so bookings made meanwhile wait instead of being lost.
+        :return: Dict with the number of "courses" and "days" rewritten.
+        """
+        logger.info("Rebuilding booking counters from subscriptions...")
+        try:
+            self.db_session.query(Course.id).with_for_update().all()
+
+            totals = select(
+                Subscriptions.course_id,
+                func.count().label("total"),
+                *[
+                    func.sum(case((Subscriptions.status == status, 1), else_=0)).label(status)
+                    for status in STATUS_COUNTERS
+                ],
+            ).group_by(Subscriptions.course_id).subquery()
+
+            self.db_session.execute(
+                update(Course)
+                .values(seats_booked=0, bookings_total=0,
+                        **{column: 0 for column in STATUS_COUNTERS.values()})
+                .execution_options(synchronize_session=False)
+            )
+            courses = self.db_session.execute(
+                update(Course)
+                .where(Course.id == totals.c.course_id)
+                .values(
+                    seats_booked=totals.c.total - totals.c.cancelled,
+                    bookings_total=totals.c.total,
+                    **{column: totals.c[status] for status, column in STATUS_COUNTERS.items()}
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+            day = func.date(Subscriptions.subscription_date)
+            self.db_session.execute(delete(DailyBookingStats))
+            days = self.db_session.execute(
+                insert(DailyBookingStats).from_select(
+                    ["day", "bookings"],
+                    select(day, func.count())
+                    .where(Subscriptions.subscription_date.isnot(None))
+                    .group_by(day)
+                )
+            ).rowcount
+
+            self.db_session.commit()
+            logger.info("Rebuilt booking counters for %s courses and %s days.", courses, days)
+            return {"courses": courses, "days": days}
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Failed to rebuild booking counters", exc_info=True)
+            raise RuntimeError("Error rebuilding booking counters.") from e
+
+    def get_dashboard(self, days=DASHBOARD_DAYS):
+        """
+        Read the admin dashboard figures from the maintained counters.
+
+        Reads one row per course plus one per day; subscriptions is never scanned.
+        Revenue is price x confirmed bookings, so price changes apply immediately.
+
+        :param days: Number of most recent days of bookings to include.
+        :return: Dict with "courses" (per-course counts and revenue, busiest first),
+                 "totals" and "daily" (list of {"day", "bookings"}, oldest first).
+        """
+        logger.info("Loading admin dashboard statistics...")
+        try:
+            rows = self.db_session.query(
+                Course.id,
+                Course.name,
+                Course.price,
+                Course.bookings_total,
+                Course.bookings_pending,
+                Course.bookings_confirmed,
+                Course.bookings_cancelled,
+            ).order_by(Course.bookings_total.desc(), Course.name).all()
+
+            since = datetime.utcnow().date() - timedelta(days=days - 1)
+            daily = self.db_session.query(DailyBookingStats.day, DailyBookingStats.bookings) \
+                .filter(DailyBookingStats.day >= since) \
+                .order_by(DailyBookingStats.day).all()
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Failed to load dashboard statistics", exc_info=True)
+            raise RuntimeError("Error loading dashboard statistics.") from e
+
+        courses = [
+            {
+                "course_id": r.id,
+                "course_name": r.name,
+                "pending": r.bookings_pending,
+                "confirmed": r.bookings_confirmed,
+                "cancelled": r.bookings_cancelled,
+                "total": r.bookings_total,
+                "revenue": r.price * r.bookings_confirmed,
+            }
+            for r in rows
+        ]
+
+        totals = {
+            name: sum(c[name] for c in courses)
+            for name in ("pending", "confirmed", "cancelled", "total", "revenue")
+        }
+        return {
+            "courses": courses,
+            "totals": totals,
+            "daily": [{"day": d.day, "bookings": d.bookings} for d in daily],
+        }
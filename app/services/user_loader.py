@@ -0,0 +1,67 @@
+# This module contains the cached Flask-Login user loader.
+import logging
+from flask_login import UserMixin
+from app.models import db, User
+from app.utils.cache import CacheRegion
+
+logger = logging.getLogger(__name__)
+
+# Keyed by user id, on the configured cache backend
+user_cache = CacheRegion("users", maxsize=10000, ttl=300)
+
+
+class UserSnapshot(UserMixin):
+    """Detached, read-only view of a user for current_user; never touches the session."""
+
+    __slots__ = ("id", "role", "first_name", "second_name", "email")
+
+    def __init__(self, id, role, first_name, second_name, email):
+        self.id = id
+        self.role = role
+        self.first_name = first_name
+        self.second_name = second_name
+        self.email = email
+
+    def __repr__(self):
+        return f"<UserSnapshot id={self.id} role={self.role}>"
+
+
+def init_user_cache(app):
+    """Apply the user cache settings from the app config."""
+    user_cache.configure(
+        maxsize=app.config.get("USER_CACHE_MAXSIZE", 10000),
+        ttl=app.config.get("USER_CACHE_TTL", 300),
+    )
+
+
+def invalidate_user(user_id):
+    """Drop a cached user so the next request reloads it from the database."""
+    logger.info("Invalidating cached user ID: %s", user_id)
+    user_cache.delete(int(user_id))
+
+
+def load_user_snapshot(user_id):
+    """
+    Flask-Login user_loader: return the cached snapshot for user_id.
+
+    On a miss, only the columns needed by current_user are selected.
+    :return: UserSnapshot, or None if the user does not exist.
+    """
+    user_id = int(user_id)
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+
+    row = db.session.query(
+        User.id,
+        User.role,
+        User.first_name,
+        User.second_name,
+        User.email
+    ).filter(User.id == user_id).first()
+    if not row:
+        return None
+
+    snapshot = UserSnapshot(row.id, row.role, row.first_name, row.second_name, row.email)
+    user_cache.set(user_id, snapshot)
+    return snapshot
@@ -2,174 +2,215 @@
 import logging
 from app.models import db, Subscriptions, User, Course, CourseModule, Module
 from sqlalchemy.orm import joinedload
+from app.services.booking_cache import bookings_cache, course_tag, invalidate_user_bookings
+from app.services.catalog_service import CatalogService
+from app.services.stats_service import StatsService
+from app.services.user_loader import invalidate_user
+from app.utils.dialects import upsert_insert
+from sqlalchemy import or_, update
 from sqlalchemy.exc import IntegrityError
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Outcomes of UserService.book_course
+BOOKED = "booked"
+ALREADY_BOOKED = "already_booked"
+SOLD_OUT = "sold_out"
+BOOKING_FAILED = "failed"
+
 class UserService:
     def get_user_bookings(self, user_id):
-        """Fetch all bookings made by a specific user."""
+        """Fetch all bookings made by a specific user (served from the per-user cache)."""
         try:
-            bookings = db.session.query(
-                Subscriptions.id,
-                Course.name.label("course_name"),
-                Subscriptions.status,
-                Subscriptions.subscription_date
-            ).join(Course, Subscriptions.course_id == Course.id)\
-             .filter(Subscriptions.user_id == user_id)\
-             .all()
-
-            return [
-                {
-                    "booking_id": b.id,
-                    "course_name": b.course_name,
-                    "status": b.status,
-                    "subscription_date": b.subscription_date.strftime("%Y-%m-%d %H:%M:%S")
-                }
-                for b in bookings
-            ]
+            overview = self.get_bookings_overview(user_id)
+            return overview["bookings"] if overview else []
         except Exception as e:
-            print(f"❌ Error fetching user bookings: {e}")
+            logger.error("Error fetching user bookings: %s", e, exc_info=True)
             return []
 
-    def book_course(self, user_id, course_id, special_requests=None):
-        """Create a course subscription for a user."""
-        try:
-            # Prevent duplicate booking
-            existing = db.session.query(Subscriptions).filter_by(
-                user_id=user_id, course_id=course_id
-            ).first()
-            if existing:
-                return False  # Already booked
-
-            booking = Subscriptions(
-                user_id=user_id,
-                course_id=course_id,
-                special_requests=special_requests or "",
-                status="pending"
-            )
-            db.session.add(booking)
-            db.session.commit()
-            return True
-        except Exception as e:
-            print(f"❌ Error booking course: {e}")
-            return False
-
-    def __init__(self, db_session=None):
-        """Allow injecting a mock database session for testing."""
-        self.db_session = db_session or db.session
+    def get_bookings_overview(self, user_id):
+        """
+        Fetch a user's profile and bookings, cached per user.
 
-    def get_all_bookings(self, user_id):
-        if not user_id or not isinstance(user_id, int):
-            logger.error(f"Invalid user_id provided: {user_id}")
-            return []  # Return an empty list if user_id is not valid
+        On a miss, one query outer-joins the user to their subscriptions and
+        courses. Entries are invalidated when the user books, when an admin
+        changes or deletes one of their bookings, when the profile changes and
+        when one of their booked courses is edited. An overview without bookings
+        is not cached, so a booking made through another worker shows at once.
+        The returned dict is shared between callers and must be treated as read-only.
+        :return: Dict with "user" and "bookings", or None if the user does not exist.
+        """
+        user_id = int(user_id)
+        overview = bookings_cache.get(user_id)
+        if overview is not None:
+            return overview
 
-        """Fetch all course bookings with user and course details."""
-        logger.info(f"Fetching bookings for user_id: {user_id} from the database...")
+        logger.info("Fetching profile and bookings for user_id: %s from the database...", user_id)
         try:
-            # Query subscriptions, joining with User and Course tables
-            bookings = db.session.query(
-                Subscriptions.id,
+            rows = self.db_session.query(
                 User.first_name,
                 User.second_name,
                 User.email,
+                Subscriptions.id.label("booking_id"),
+                Subscriptions.course_id,
                 Course.name.label("course_name"),
-                Course.description,
                 Course.price,
                 Subscriptions.special_requests,
                 Subscriptions.status,
                 Subscriptions.subscription_date
-            ).join(User, Subscriptions.user_id == User.id)\
-             .join(Course, Subscriptions.course_id == Course.id)\
-             .filter(Subscriptions.user_id == user_id)\
+            ).outerjoin(Subscriptions, Subscriptions.user_id == User.id)\
+             .outerjoin(Course, Subscriptions.course_id == Course.id)\
+             .filter(User.id == user_id)\
+             .order_by(Subscriptions.subscription_date, Subscriptions.id)\
              .all()
+        except Exception as e:
+            self.db_session.rollback()
+            logger.error("Failed to fetch user bookings", exc_info=True)
+            raise RuntimeError("Unable to fetch your bookings due to a database error. Please try again later.") from e
 
-            if not bookings:
-                logger.info(f"No bookings found for user_id: {user_id}")
-                return []
+        if not rows:
+            logger.warning("No data found for user ID: %s", user_id)
+            return None
 
-            logger.debug(f"Fetched bookings: {bookings}")
-            
-            # Convert results to a list of dictionaries
-            return [
-                {   
-                    "user_name": f"{b.first_name} {b.second_name}",
+        profile = rows[0]
+        user_name = f"{profile.first_name} {profile.second_name}"
+        overview = {
+            "user": {
+                "user_id": user_id,
+                "first_name": profile.first_name,
+                "second_name": profile.second_name,
+                "user_name": user_name,
+                "user_email": profile.email
+            },
+            "bookings": [
+                {
+                    "user_name": user_name,
                     "User.first_name": b.first_name,
                     "User.second_name,": b.second_name,
                     "user_email": b.email,
                     "course_name": b.course_name,
-                    "booking_id": b.id,
+                    "booking_id": b.booking_id,
                     "status": b.status,
                     "subscription_date": b.subscription_date.strftime("%Y-%m-%d %H:%M:%S"),
                     "Subscriptions.special_requests": b.special_requests,
                     "Course.price": b.price
                 }
-                for b in bookings
+                # The outer join yields one row with no booking for users without bookings
+                for b in rows if b.booking_id is not None
             ]
-        except Exception as e:
-            logger.error("Failed to fetch bookings", exc_info=True)
-            raise RuntimeError("Unable to fetch your bookings due to a database error. Please try again later.") from e
-   
-
+        }
+        if overview["bookings"]:
+            course_ids = {b.course_id for b in rows if b.booking_id is not None}
+            bookings_cache.set(user_id, overview, tags=[course_tag(course_id) for course_id in course_ids])
+        return overview
 
+    def book_course(self, user_id, course_id, special_requests=None):
+        """
+        Reserve a seat and create a course subscription for a user.
 
-    def get_all_course_details(self):
-        """Fetch all courses along with their associated modules."""
-        logger.info("Fetching all course details from the database...")
+        The seat is taken with a conditional UPDATE on the course row
+        (seats_booked < capacity), so concurrent bookings never oversell and only
+        contend on the course being booked. The booking itself is a single
+        INSERT ... ON CONFLICT (user_id, course_id) DO NOTHING RETURNING id; if the
+        user already holds a booking the transaction is rolled back, releasing
+        the seat. When no seat is left, an existing booking is still reported as
+        ALREADY_BOOKED rather than SOLD_OUT. The same UPDATE maintains the course booking counters, and the
+        daily totals are updated in the same transaction.
+        :return: BOOKED, ALREADY_BOOKED, SOLD_OUT or BOOKING_FAILED.
+        """
+        values = {
+            "user_id": user_id,
+            "course_id": course_id,
+            "special_requests": special_requests or "",
+            "status": "pending"
+        }
         try:
-            # Query all courses, eagerly loading their modules and module details
-            courses = db.session.query(Course).options(
-                joinedload(Course.modules).joinedload(CourseModule.module)
-            ).all()
+            reserved = self.db_session.execute(
+                update(Course)
+                .where(Course.id == course_id)
+                .where(or_(Course.capacity.is_(None), Course.seats_booked < Course.capacity))
+                .values(**StatsService.counter_values(None, "pending"))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not reserved:
+                self.db_session.rollback()
+                # A full course the user is already on is not "sold out" to them
+                if self.db_session.query(Subscriptions.id).filter_by(user_id=user_id, course_id=course_id).first():
+                    logger.info("User %s has already booked course %s.", user_id, course_id)
+                    return ALREADY_BOOKED
+                logger.info("Course %s is sold out or does not exist.", course_id)
+                return SOLD_OUT
 
-            # Structure the result as a list of dictionaries for easier consumption
-            course_details = [
-                {
-                    "course_id": course.id,
-                    "course_name": course.name,
-                    "course_description": course.description,
-                    "course_price": course.price,
-                    "modules": [
-                        {
-                            "module_id": module.module.id,
-                            "module_title": module.module.title,
-                            "module_description": module.module.description
-                        }
-                        for module in course.modules
-                    ]
-                }
-                for course in courses
-            ]
+            insert = upsert_insert(self.db_session, Subscriptions)
+            if insert is not None:
+                statement = insert.values(**values) \
+                    .on_conflict_do_nothing(index_elements=["user_id", "course_id"]) \
+                    .returning(Subscriptions.id, Subscriptions.subscription_date)
+                booking_id, booking_date = self.db_session.execute(statement).first() or (None, None)
+            else:
+                # No ON CONFLICT support: rely on the unique index
+                booking = Subscriptions(**values)
+                self.db_session.add(booking)
+                try:
+                    with self.db_session.begin_nested():
+                        self.db_session.flush()
+                    booking_id = booking.id
+                    self.db_session.refresh(booking, ["subscription_date"])
+                    booking_date = booking.subscription_date
+                except IntegrityError:
+                    booking_id = None
+
+            if booking_id is None:
+                self.db_session.rollback()  # Release the reserved seat
+                logger.info("User %s has already booked course %s.", user_id, course_id)
+                return ALREADY_BOOKED
 
-            logger.info(f"Successfully fetched details for {len(course_details)} courses.")
-            return course_details
+            self.stats_service.record_daily_bookings(booking_date.date() if booking_date else None)
+            self.db_session.commit()
+            invalidate_user_bookings(user_id)
+            return BOOKED
         except Exception as e:
-            logger.error("Failed to fetch course details", exc_info=True)
-            raise RuntimeError("Error fetching course details from the database.") from e
+            self.db_session.rollback()
+            logger.error("Error booking course: %s", e, exc_info=True)
+            return BOOKING_FAILED
+
+    def __init__(self, db_session=None):
+        """Allow injecting a mock database session for testing."""
+        self.db_session = db_session or db.session
+        self.stats_service = StatsService(self.db_session)
+
+    def get_all_bookings(self, user_id):
+        if not user_id or not isinstance(user_id, int):
+            logger.error("Invalid user_id provided: %s", user_id)
+            return []  # Return an empty list if user_id is not valid
+
+        """Fetch all course bookings with user and course details (served from the per-user cache)."""
+        overview = self.get_bookings_overview(user_id)
+        if not overview or not overview["bookings"]:
+            logger.info("No bookings found for user_id: %s", user_id)
+            return []
+        return overview["bookings"]
+
+    def get_all_course_details(self):
+        """Fetch all courses along with their associated modules (cached)."""
+        return CatalogService(self.db_session).get_all_course_details()
 
- 
-    
     def get_user_data(self, user_id):
         """Fetch user data using the provided user ID."""
         if not user_id:
             logger.error("Invalid user ID provided.")
             return None
 
-        logger.info(f"Fetching data for user ID: {user_id}")
+        logger.info("Fetching data for user ID: %s", user_id)
         try:
             # Fetch user data from the database
             user = db.session.query(User).filter_by(id=user_id).first()
             
             if not user:
-                logger.warning(f"No data found for user ID: {user_id}")
+                logger.warning("No data found for user ID: %s", user_id)
                 return None
             
-            logger.debug(f"Fetched user data: {user}")
+            logger.debug("Fetched user data: %s", user)
             return user
         except Exception as e:
             logger.error("Error fetching user data from the database", exc_info=True)
@@ -188,7 +229,7 @@ class UserService:
             # Fetch the user from the database
             user = self.db_session.query(User).filter_by(id=user_id).first()
             if not user:
-                logger.error(f"User with ID {user_id} not found.")
+                logger.error("User with ID %s not found.", user_id)
                 return False, "User not found."
 
             # Update fields dynamically
@@ -201,11 +242,13 @@ class UserService:
 
             # Commit the changes
             self.db_session.commit()
-            logger.info(f"User with ID {user_id} updated successfully.")
+            invalidate_user(user_id)
+            invalidate_user_bookings(user_id)
+            logger.info("User with ID %s updated successfully.", user_id)
             return True, "User updated successfully."
         except Exception as e:
             self.db_session.rollback()
-            logger.error(f"An error occurred while updating user with ID {user_id}: {e}", exc_info=True)
+            logger.error("An error occurred while updating user with ID %s: %s", user_id, e, exc_info=True)
             return False, "An unexpected error occurred."
         
     def create_user(self, password, **kwargs):
@@ -223,15 +266,15 @@ class UserService:
             # Add the new user to the database
             db.session.add(new_user)
             db.session.commit()
-            logger.info(f"User {new_user.first_name} {new_user.second_name} created successfully.")
+            logger.info("User %s %s created successfully.", new_user.first_name, new_user.second_name)
             return True, "User created successfully."
         except IntegrityError as e:
             self.db_session.rollback()
-            logger.error(f"Integrity Error: {e}")
+            logger.error("Integrity Error: %s", e)
             return False, "Email must be unique."
         except Exception as e:
             self.db_session.rollback()
-            logger.error(f"An error occurred while creating a new user: {e}", exc_info=True)
+            logger.error("An error occurred while creating a new user: %s", e, exc_info=True)
             return False, "An unexpected error occurred."
         
 
@@ -246,16 +289,17 @@ class UserService:
             # Fetch the user from the database
             user = self.db_session.query(User).filter_by(id=user_id).first()
             if not user:
-                logger.error(f"User with ID {user_id} not found.")
+                logger.error("User with ID %s not found.", user_id)
                 return False, "User not found."
 
             # Hash and set the new password
             user.set_password(new_password)
             self.db_session.commit()
-            logger.info(f"Password for user with ID {user_id} updated successfully.")
+            invalidate_user(user_id)
+            logger.info("Password for user with ID %s updated successfully.", user_id)
             return True, "Password updated successfully."
 
         except Exception as e:
             self.db_session.rollback()
-            logger.error(f"An error occurred while updating password for user with ID {user_id}: {e}", exc_info=True)
+            logger.error("An error occurred while updating password for user with ID %s: %s", user_id, e, exc_info=True)
             return False, "An unexpected error occurred."        
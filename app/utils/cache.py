@@ -0,0 +1,375 @@
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Tag implicitly attached to every entry so a whole region can be invalidated
+ALL_TAG = "__all__"
+
+
+class TTLCache:
+    """Thread-safe in-process cache with a size bound (LRU) and per-entry TTL."""
+
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            # Mark as most recently used
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting the least recently used entry when full."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a single key from the cache."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._data.clear()
+
+    def configure(self, maxsize=None, ttl=None):
+        """Resize the cache or change its default TTL; existing entries are dropped."""
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            self._data.clear()
+
+    def __contains__(self, key):
+        """Whether key is stored, without refreshing its LRU position."""
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class MemoryBackend:
+    """In-process LRU + TTL backend with tag invalidation."""
+
+    def __init__(self, maxsize=128, ttl=300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._tags = defaultdict(set)
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl=None, tags=()):
+        with self._lock:
+            self._cache.set(key, value, ttl)
+            for tag in tags:
+                keys = self._tags[tag]
+                keys.add(key)
+                # Keys dropped by the LRU stay in the tag index; prune once it outgrows the cache
+                if len(keys) > 2 * self._cache.maxsize:
+                    self._tags[tag] = {k for k in keys if k in self._cache}
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._cache.delete(key)
+
+    def invalidate_tags(self, *tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._cache.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._tags.clear()
+
+
+class RedisBackend:
+    """
+    Cache shared by every process through a Redis-protocol server.
+
+    Values are pickled together with their tags; each tag is a server-side set
+    of keys. Reads are fronted by a short-lived local copy (local_ttl), and
+    deletes/tag invalidations are published on the invalidation channel so
+    other processes drop their local copies immediately. Server errors are
+    logged and treated as cache misses, so the database remains the fallback.
+    """
+
+    def __init__(self, client, namespace, ttl=300, maxsize=128, local_ttl=10, channel=None):
+        from redis.exceptions import RedisError
+
+        self.client = client
+        self.errors = RedisError
+        self.namespace = namespace
+        self.ttl = ttl
+        self.channel = channel
+        self.local = MemoryBackend(maxsize=maxsize, ttl=local_ttl) if local_ttl else None
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def _tag_key(self, tag):
+        return f"{self.namespace}:tag:{tag}"
+
+    def _start_listener(self):
+        if self.local is not None:
+            _subscriber.ensure_running(self.client, self.channel)
+
+    def get(self, key):
+        if self.local is not None:
+            value = self.local.get(key)
+            if value is not None:
+                return value
+
+        self._start_listener()
+        try:
+            raw = self.client.get(self._key(key))
+        except self.errors as e:
+            logger.warning("Cache read failed for %s: %s", self._key(key), e)
+            return None
+        if raw is None:
+            return None
+
+        value, tags = pickle.loads(raw)
+        if self.local is not None:
+            self.local.set(key, value, tags=tags)
+        return value
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = self.ttl if ttl is None else ttl
+        tags = tuple(tags)
+        self._start_listener()
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(self._key(key), pickle.dumps((value, tags)), ex=ttl or None)
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), self._key(key))
+                if ttl:
+                    pipe.expire(self._tag_key(tag), ttl)
+            pipe.execute()
+        except self.errors as e:
+            logger.warning("Cache write failed for %s: %s", self._key(key), e)
+            return
+        if self.local is not None:
+            self.local.set(key, value, tags=tags)
+
+    def delete(self, *keys):
+        if self.local is not None:
+            self.local.delete(*keys)
+        try:
+            self.client.delete(*[self._key(key) for key in keys])
+        except self.errors as e:
+            logger.warning("Cache delete failed for %s keys %s: %s", self.namespace, keys, e)
+        self._publish({"keys": list(keys)})
+
+    def invalidate_tags(self, *tags):
+        if self.local is not None:
+            self.local.invalidate_tags(*tags)
+        try:
+            for tag in tags:
+                members = self.client.smembers(self._tag_key(tag))
+                self.client.delete(self._tag_key(tag), *members)
+        except self.errors as e:
+            logger.warning("Cache tag invalidation failed for %s tags %s: %s", self.namespace, tags, e)
+        self._publish({"tags": list(tags)})
+
+    def clear(self):
+        self.invalidate_tags(ALL_TAG)
+
+    def _publish(self, message):
+        if not self.channel:
+            return
+        self._start_listener()
+        message.update(namespace=self.namespace, sender=_subscriber.sender_id)
+        try:
+            self.client.publish(self.channel, json.dumps(message))
+        except self.errors as e:
+            logger.warning("Cache invalidation publish failed on %s: %s", self.channel, e)
+
+
+class _InvalidationSubscriber:
+    """
+    Per-process listener applying other processes' invalidations to local copies.
+
+    Started lazily on first use in each process, so it also works in pre-forked
+    workers (threads do not survive fork).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self.sender_id = None
+        self.local_backends = {}
+
+    def ensure_running(self, client, channel):
+        if not channel or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.sender_id = uuid.uuid4().hex
+            thread = threading.Thread(
+                target=self._listen, args=(client, channel), name="cache-invalidation", daemon=True
+            )
+            thread.start()
+
+    def _listen(self, client, channel):
+        from redis.exceptions import RedisError
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(channel)
+                for message in pubsub.listen():
+                    self._apply(message.get("data"))
+            except RedisError as e:
+                # Local copies expire after local_ttl, bounding staleness while reconnecting
+                logger.warning("Cache invalidation listener disconnected from %s: %s", channel, e)
+                time.sleep(1)
+
+    def _apply(self, data):
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if message.get("sender") == self.sender_id:
+            return
+        backend = self.local_backends.get(message.get("namespace"))
+        if backend is None or backend.local is None:
+            return
+        if message.get("keys"):
+            backend.local.delete(*message["keys"])
+        if message.get("tags"):
+            backend.local.invalidate_tags(*message["tags"])
+
+
+_subscriber = _InvalidationSubscriber()
+
+# Backend settings applied by init_cache(); memory until configured otherwise
+_settings = {"backend": "memory"}
+_redis_client = None
+_regions = {}
+
+
+def _get_redis_client(url):
+    global _redis_client
+    if _redis_client is None:
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package.") from e
+        _redis_client = redis.Redis.from_url(url)
+    return _redis_client
+
+
+class CacheRegion:
+    """
+    Named cache used by the service layer.
+
+    Regions are declared at import time and bound to the backend chosen by
+    init_cache(); keys are namespaced by region, so the same key can be used
+    in different regions. Keys must be strings or integers.
+    """
+
+    def __init__(self, namespace, maxsize=128, ttl=300):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._backend = None
+        self._build_backend()
+        _regions[namespace] = self
+
+    def _build_backend(self):
+        if _settings["backend"] == "redis":
+            self._backend = RedisBackend(
+                _get_redis_client(_settings["redis_url"]),
+                namespace=f"{_settings['key_prefix']}{self.namespace}",
+                ttl=self.ttl,
+                maxsize=self.maxsize,
+                local_ttl=_settings["local_ttl"],
+                channel=_settings["channel"],
+            )
+            _subscriber.local_backends[self._backend.namespace] = self._backend
+        else:
+            self._backend = MemoryBackend(maxsize=self.maxsize, ttl=self.ttl)
+
+    def configure(self, maxsize=None, ttl=None):
+        """Change the size bound or default TTL; rebinds to the configured backend."""
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if ttl is not None:
+            self.ttl = ttl
+        self._build_backend()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        value = self._backend.get(key)
+        return default if value is None else value
+
+    def set(self, key, value, ttl=None, tags=()):
+        """Store value under key, optionally tagged for invalidate_tags()."""
+        self._backend.set(key, value, ttl=ttl, tags=(ALL_TAG, *tags))
+
+    def delete(self, key):
+        """Remove a single key, in every process."""
+        self._backend.delete(key)
+
+    def invalidate_tags(self, *tags):
+        """Remove every entry stored with any of the given tags, in every process."""
+        self._backend.invalidate_tags(*tags)
+
+    def clear(self):
+        """Remove every entry of this region, in every process."""
+        self._backend.clear()
+
+
+def init_cache(app):
+    """
+    Select the cache backend from the app config and rebind every region to it.
+
+    Call before the per-region init_* functions, which then apply their sizes and TTLs.
+    """
+    global _redis_client
+    _settings.update(
+        backend=app.config.get("CACHE_BACKEND", "memory"),
+        redis_url=app.config.get("CACHE_REDIS_URL", "redis://localhost:6379/0"),
+        key_prefix=app.config.get("CACHE_KEY_PREFIX", "moviemaking:"),
+        local_ttl=app.config.get("CACHE_LOCAL_TTL", 10),
+        channel=app.config.get("CACHE_INVALIDATION_CHANNEL", "moviemaking:cache-invalidation"),
+    )
+    if _settings["backend"] not in ("memory", "redis"):
+        raise RuntimeError(f"Unknown CACHE_BACKEND: {_settings['backend']}")
+    _redis_client = None
+    for region in _regions.values():
+        region._build_backend()
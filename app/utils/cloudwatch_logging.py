@@ -0,0 +1,245 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+# PutLogEvents limits: events and bytes per call (each event costs its UTF-8 size + 26 bytes),
+# bytes per event, and the time span one call may cover
+MAX_BATCH_COUNT = 10000
+MAX_BATCH_BYTES = 1048576
+EVENT_OVERHEAD_BYTES = 26
+MAX_EVENT_BYTES = 262144 - EVENT_OVERHEAD_BYTES
+MAX_BATCH_SPAN_MS = 24 * 60 * 60 * 1000
+
+# Errors worth retrying; connection errors carry no code and are retried too
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException", "ServiceUnavailableException", "InternalFailure", "ResourceNotFoundException",
+}
+
+
+def _error_code(error):
+    return getattr(error, "response", {}).get("Error", {}).get("Code")
+
+
+class CloudWatchLogHandler(logging.Handler):
+    """
+    Buffered handler shipping records to a CloudWatch Logs stream in batches.
+
+    emit() only appends to an in-memory buffer. A background thread sends a
+    batch once it reaches max_batch_count events or max_batch_bytes, or when
+    its oldest event is flush_interval seconds old; flush() and close() (run
+    by logging.shutdown() at exit) send whatever is left. The log group and
+    stream are created on the first send if they do not exist; if that is not
+    allowed (e.g. no logs:CreateLogGroup permission) sending goes ahead anyway.
+
+    Events from a send that failed with a transient error (throttling, service
+    or connection errors) go back to the buffer and are retried with
+    exponential backoff, up to max_retries times before they are dropped.
+    """
+
+    def __init__(self, log_group, log_stream, client=None, region_name=None, flush_interval=5.0,
+                 max_batch_count=MAX_BATCH_COUNT, max_batch_bytes=MAX_BATCH_BYTES, max_buffered=100000,
+                 max_retries=5, retry_backoff=1.0, max_retry_backoff=60.0):
+        """
+        :param client: CloudWatch Logs client (or a stub with the same methods); created from boto3 when omitted.
+        :param max_buffered: Events kept while CloudWatch is unreachable; newer ones are dropped beyond that.
+        :param max_retries: Consecutive failed sends retried before the pending events are dropped.
+        :param retry_backoff: Seconds before the first retry; doubled after each failure up to max_retry_backoff.
+        """
+        super().__init__()
+        self.log_group = log_group
+        self.log_stream = log_stream
+        self.region_name = region_name
+        self.flush_interval = flush_interval
+        self.max_batch_count = min(max_batch_count, MAX_BATCH_COUNT)
+        self.max_batch_bytes = min(max_batch_bytes, MAX_BATCH_BYTES)
+        self.max_buffered = max_buffered
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.dropped = 0
+        self._failures = 0
+        self._retry_at = None
+        self._client = client
+        self._stream_ready = False
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._oldest = None
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._thread_pid = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.session.Session(region_name=self.region_name).client("logs")
+        return self._client
+
+    def emit(self, record):
+        try:
+            message = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        encoded = message.encode("utf-8")
+        if len(encoded) > MAX_EVENT_BYTES:
+            message = encoded[:MAX_EVENT_BYTES].decode("utf-8", "ignore")
+            encoded = message.encode("utf-8")
+        event = {"timestamp": int(record.created * 1000), "message": message}
+
+        with self._condition:
+            if len(self._buffer) >= self.max_buffered:
+                self.dropped += 1
+                return
+            self._buffer.append(event)
+            self._buffer_bytes += len(encoded) + EVENT_OVERHEAD_BYTES
+            if self._oldest is None:
+                # Wake the flusher so it times this batch's max age
+                self._oldest = time.monotonic()
+                self._condition.notify()
+            elif len(self._buffer) >= self.max_batch_count or self._buffer_bytes >= self.max_batch_bytes:
+                self._condition.notify()
+        self._ensure_thread()
+
+    def _after_fork(self):
+        # Events buffered before the fork are the parent's to send
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._buffer, self._buffer_bytes, self._oldest = [], 0, None
+        self._failures, self._retry_at = 0, None
+
+    def _ensure_thread(self):
+        # Threads do not survive fork; each process starts its own flusher
+        if self._thread_pid == os.getpid() or self._closed:
+            return
+        with self._condition:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name="cloudwatch-log-flusher", daemon=True).start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._batch_due():
+                    if self._retry_at is not None:
+                        timeout = max(0.0, self._retry_at - time.monotonic())
+                    elif self._oldest is not None:
+                        timeout = max(0.0, self._oldest + self.flush_interval - time.monotonic())
+                    else:
+                        timeout = None
+                    self._condition.wait(timeout)
+                if self._closed:
+                    return
+            self._send_pending()
+
+    def _batch_due(self):
+        if not self._buffer:
+            return False
+        if self._retry_at is not None:
+            return time.monotonic() >= self._retry_at
+        return (len(self._buffer) >= self.max_batch_count
+                or self._buffer_bytes >= self.max_batch_bytes
+                or time.monotonic() - self._oldest >= self.flush_interval)
+
+    def _take_buffer(self):
+        with self._condition:
+            events, self._buffer = self._buffer, []
+            self._buffer_bytes = 0
+            self._oldest = None
+            return events
+
+    def _batches(self, events):
+        """Split events, oldest first, into PutLogEvents-sized calls."""
+        events.sort(key=lambda event: event["timestamp"])
+        batch, size = [], 0
+        for event in events:
+            event_size = len(event["message"].encode("utf-8")) + EVENT_OVERHEAD_BYTES
+            if batch and (len(batch) >= self.max_batch_count
+                          or size + event_size > self.max_batch_bytes
+                          or event["timestamp"] - batch[0]["timestamp"] > MAX_BATCH_SPAN_MS):
+                yield batch
+                batch, size = [], 0
+            batch.append(event)
+            size += event_size
+        if batch:
+            yield batch
+
+    def _ensure_stream(self):
+        if self._stream_ready:
+            return
+        for create, kwargs in (
+            (self.client.create_log_group, {"logGroupName": self.log_group}),
+            (self.client.create_log_stream, {"logGroupName": self.log_group, "logStreamName": self.log_stream}),
+        ):
+            try:
+                create(**kwargs)
+            except self.client.exceptions.ResourceAlreadyExistsException:
+                pass
+            except Exception as e:
+                # Often the role may write to an existing stream but not create one
+                print(f"⚠️ Could not create CloudWatch log group/stream, sending anyway: {e}", file=sys.stderr)
+        self._stream_ready = True
+
+    def _send_pending(self):
+        with self._send_lock:
+            events = self._take_buffer()
+            if not events:
+                return
+            sent = 0
+            try:
+                self._ensure_stream()
+                # _batches() sorts events in place, so the unsent ones are always the tail
+                for batch in self._batches(events):
+                    self.client.put_log_events(
+                        logGroupName=self.log_group, logStreamName=self.log_stream, logEvents=batch
+                    )
+                    sent += len(batch)
+            except Exception as e:
+                # Logging must not take the process down; retry later or report on stderr and drop
+                self._send_failed(events[sent:], e)
+            else:
+                self._failures, self._retry_at = 0, None
+
+    def _send_failed(self, events, error):
+        code = _error_code(error)
+        if code == "ResourceNotFoundException":
+            # The group or stream was deleted; create it again on the retry
+            self._stream_ready = False
+        self._failures += 1
+        if (code is not None and code not in RETRYABLE_ERROR_CODES) or self._failures > self.max_retries:
+            self._failures, self._retry_at = 0, None
+            print(f"❌ Failed to ship {len(events)} log events to CloudWatch: {error}", file=sys.stderr)
+            return
+
+        delay = min(self.retry_backoff * 2 ** (self._failures - 1), self.max_retry_backoff)
+        with self._condition:
+            # Requeue ahead of newer events, keeping the buffer within max_buffered
+            room = max(0, self.max_buffered - len(self._buffer))
+            requeued = events[len(events) - room:] if room < len(events) else events
+            self.dropped += len(events) - len(requeued)
+            self._buffer[:0] = requeued
+            self._buffer_bytes += sum(len(event["message"].encode("utf-8")) + EVENT_OVERHEAD_BYTES
+                                      for event in requeued)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._retry_at = time.monotonic() + delay
+            self._condition.notify()
+
+    def flush(self):
+        """Send every buffered event now."""
+        self._send_pending()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self.flush()
+        if self.dropped:
+            print(f"⚠️ Dropped {self.dropped} log events while the CloudWatch buffer was full.", file=sys.stderr)
+        super().close()
@@ -0,0 +1,100 @@
+import logging
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Thread-safe counters of connection checkouts from one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait, slow=False, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if slow:
+                self.slow_checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "wait_avg_ms": round(1000 * self.wait_total / attempts, 3) if attempts else 0.0,
+                "wait_max_ms": round(1000 * self.wait_max, 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that measures how long each checkout waits for a connection.
+
+    The wait covers queueing for a free connection and opening an overflow
+    one. Checkouts slower than slow_checkout_seconds are logged, which is the
+    signal that the pool is too small for the workers and threads using it.
+    """
+
+    # Set from Config.DB_POOL_SLOW_CHECKOUT_MS by create_app
+    slow_checkout_seconds = 0.1
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            wait = time.perf_counter() - start
+            self.metrics.record(wait, slow=True, timed_out=True)
+            logger.error("Connection pool exhausted after waiting %.0f ms: %s", wait * 1000, self.status())
+            raise
+
+        wait = time.perf_counter() - start
+        slow = wait >= self.slow_checkout_seconds
+        self.metrics.record(wait, slow=slow)
+        if slow:
+            logger.warning("Slow connection checkout (%.0f ms): %s", wait * 1000, self.status())
+        return connection
+
+
+def pool_stats(engine):
+    """
+    Describe the engine's pool usage in this process.
+
+    saturation is checked-out connections over the most the pool may open
+    (pool_size + max_overflow); near 1.0 means requests queue for connections.
+    :return: Dict of pool gauges, plus checkout wait metrics for InstrumentedQueuePool.
+    """
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        stats.update(
+            pool_size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=pool.overflow(),
+            saturation=round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(pool.metrics.snapshot())
+    return stats
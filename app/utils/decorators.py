@@ -19,6 +19,12 @@ from flask_login import current_user
 #         return wrapped_view
 #     return decorator
 def role_required(role):
+    """
+    Restrict access to users with a specific role (e.g., 'admin').
+
+    current_user is the cached UserSnapshot from the user loader, so this check
+    reads plain attributes and never lazy-loads the ORM user.
+    """
     def decorator(view_func):
         @wraps(view_func)
         def wrapped_view(*args, **kwargs):
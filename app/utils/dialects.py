@@ -0,0 +1,17 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Dialects whose INSERT supports ON CONFLICT ... DO NOTHING/UPDATE and RETURNING
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def upsert_insert(session, table):
+    """
+    Return a dialect-specific INSERT supporting on_conflict_do_nothing().
+
+    :return: The Insert construct, or None if the session's database has no ON CONFLICT support.
+    """
+    insert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    return insert(table) if insert else None
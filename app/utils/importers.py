@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+import re
+
+# Bytes read from the upload per step when decoding JSON
+_JSON_READ_SIZE = 64 * 1024
+
+# Separators between JSON objects: whitespace, array brackets and commas
+_JSON_SEPARATORS = re.compile(r"[ \t\r\n\[\],]*")
+
+
+class RowError(ValueError):
+    """A row that could not be parsed; yielded in its place so the rest of the file still imports."""
+
+
+def detect_format(filename, requested=None):
+    """
+    Work out the import format from an explicit choice or the file extension.
+
+    :return: "csv" or "json", or None if neither applies.
+    """
+    if requested:
+        requested = requested.lower()
+        return requested if requested in ("csv", "json") else None
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return "csv"
+    if extension in ("json", "jsonl", "ndjson"):
+        return "json"
+    return None
+
+
+def iter_csv_rows(binary_stream):
+    """
+    Yield each CSV row of a binary upload as a dict, reading it line by line.
+
+    A row the csv module rejects (e.g. a field over the size limit) is yielded
+    as a RowError and reading carries on with the next line.
+    """
+    text_stream = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text_stream)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield RowError(f"Malformed CSV row: {e}")
+            continue
+        yield row
+
+
+def iter_json_rows(binary_stream):
+    """
+    Yield objects from a JSON array or JSON Lines upload without loading it whole.
+
+    The stream is decoded incrementally with JSONDecoder.raw_decode, so memory
+    stays bounded by the largest single object rather than the file size.
+    Objects are decoded in place from a read position; the consumed text is
+    only cut off the buffer when more has to be read, so parsing stays linear.
+    """
+    text_stream = io.TextIOWrapper(binary_stream, encoding="utf-8-sig")
+    decoder = json.JSONDecoder()
+    buffer = ""
+    idx = 0
+    eof = False
+
+    while True:
+        idx = _JSON_SEPARATORS.match(buffer, idx).end()
+        if idx < len(buffer):
+            try:
+                obj, idx = decoder.raw_decode(buffer, idx)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError("Malformed JSON in import file.")
+                # Object is split across reads; fall through to pull in more text and retry
+            else:
+                yield obj
+                continue
+        elif eof:
+            return
+
+        chunk = text_stream.read(_JSON_READ_SIZE)
+        eof = not chunk
+        buffer = buffer[idx:] + chunk
+        idx = 0
@@ -0,0 +1,184 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import socket
+import sys
+import threading
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed with extra= and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# High-volume info lines kept at these rates unless LOG_SAMPLING overrides them
+DEFAULT_SAMPLING = {
+    "Fetching all bookings": 0.1,
+    "Fetching bookings for Course ID": 0.1,
+    "Successfully fetched": 0.1,
+    "Rendering homepage": 0.1,
+    "Fetching details for course ID": 0.1,
+    "Search results fetched successfully": 0.1,
+}
+
+_listener = None
+_queue_handler = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra= fields included."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a queue read in the same process.
+
+    The stock prepare() renders the traceback into the message on the caller's
+    thread; here only the message is merged with its args (so later changes to
+    mutable args cannot alter it) and exc_info is left for the listener to format.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in every 1/rate records whose message template starts with a sampled prefix.
+
+    Only records below WARNING are sampled. Matching uses the unformatted
+    template, so "Fetching bookings for Course ID: %s" is one stream whatever
+    the argument. Kept records carry sample_rate so counts can be scaled back up.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = {prefix: rate for prefix, rate in rates.items() if rate < 1}
+        self._counters = {prefix: 0 for prefix in self.rates}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not isinstance(record.msg, str):
+            return True
+        for prefix, rate in self.rates.items():
+            if record.msg.startswith(prefix):
+                if rate <= 0:
+                    return False
+                with self._lock:
+                    count = self._counters[prefix]
+                    self._counters[prefix] = count + 1
+                if count % round(1 / rate):
+                    return False
+                record.sample_rate = rate
+                return True
+        return True
+
+
+def _parse_pairs(value):
+    """Parse "name=value,name=value" into a dict."""
+    pairs = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            name, _, setting = item.rpartition("=")
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+def _start_listener(log_queue, handlers):
+    global _listener
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork (e.g. gunicorn preload_app); start one per worker.
+    # The child gets its own queue: records the parent had not written yet stay the parent's.
+    if _listener is not None:
+        _queue_handler.queue = queue.SimpleQueue()
+        _start_listener(_queue_handler.queue, _listener.handlers)
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def configure_logging():
+    """
+    Route all logging through a queue drained by a background thread.
+
+    Request threads only enqueue records; formatting and I/O happen on the
+    listener thread. Configured from the environment, once per process:
+
+    - LOG_LEVEL: root level (default INFO).
+    - LOG_LEVELS: per-logger levels, e.g. "sqlalchemy.engine=WARNING,app.services=DEBUG".
+    - LOG_FORMAT: "json" (default) or "text".
+    - LOG_FILE: also write to this file.
+    - LOG_CLOUDWATCH_GROUP: also ship to this CloudWatch Logs group, in batches, on stream
+      LOG_CLOUDWATCH_STREAM (default: host name) in LOG_CLOUDWATCH_REGION.
+    - LOG_SAMPLING: message prefix rates, e.g. "Fetching all bookings=0.01";
+      merged over DEFAULT_SAMPLING, a rate of 1 disables sampling for that prefix.
+    """
+    global _queue_handler
+    with _lock:
+        if _listener is not None:
+            return
+
+        formatter = JsonFormatter() if os.getenv("LOG_FORMAT", "json") == "json" else logging.Formatter(TEXT_FORMAT)
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if os.getenv("LOG_FILE"):
+            handlers.append(logging.FileHandler(os.getenv("LOG_FILE")))
+        if os.getenv("LOG_CLOUDWATCH_GROUP"):
+            from app.utils.cloudwatch_logging import CloudWatchLogHandler
+            handlers.append(CloudWatchLogHandler(
+                os.getenv("LOG_CLOUDWATCH_GROUP"),
+                os.getenv("LOG_CLOUDWATCH_STREAM", socket.gethostname()),
+                region_name=os.getenv("LOG_CLOUDWATCH_REGION", "eu-west-1"),
+                flush_interval=float(os.getenv("LOG_CLOUDWATCH_FLUSH_SECONDS", "5")),
+            ))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        rates = dict(DEFAULT_SAMPLING)
+        rates.update({prefix: float(rate) for prefix, rate in _parse_pairs(os.getenv("LOG_SAMPLING")).items()})
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = _InProcessQueueHandler(log_queue)
+        _queue_handler.addFilter(SamplingFilter(rates))
+
+        root = logging.getLogger()
+        root.handlers[:] = [_queue_handler]
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        for name, level in _parse_pairs(os.getenv("LOG_LEVELS")).items():
+            logging.getLogger(name).setLevel(level.upper())
+
+        _start_listener(log_queue, handlers)
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        # Flush queued records on shutdown
+        atexit.register(_stop_listener)
@@ -0,0 +1,41 @@
+import base64
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def clamp_page_size(page_size):
+    """Keep a requested page size within 1..MAX_PAGE_SIZE."""
+    if not page_size:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(page_size), MAX_PAGE_SIZE))
+
+
+def encode_cursor(timestamp, row_id):
+    """
+    Encode a (timestamp, id) keyset position as an opaque URL-safe token.
+
+    timestamp is a datetime, or the timestamp text exactly as the database stored it.
+    """
+    if not isinstance(timestamp, str):
+        timestamp = timestamp.isoformat()
+    raw = f"{timestamp}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a token produced by encode_cursor.
+
+    :return: Tuple (timestamp text as encoded, id), or None if the cursor is missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, row_id = raw.rsplit("|", 1)
+        datetime.fromisoformat(timestamp)  # validate
+        return timestamp, int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
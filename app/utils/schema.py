@@ -0,0 +1,203 @@
+import logging
+import re
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex
+from app.models import db
+from app.services.stats_service import StatsService
+
+logger = logging.getLogger(__name__)
+
+# Statements run once, right after the named column is added to an existing table
+COLUMN_BACKFILLS = {
+    ("courses", "seats_booked"): (
+        "UPDATE courses SET seats_booked = ("
+        "SELECT count(*) FROM subscriptions s "
+        "WHERE s.course_id = courses.id AND s.status != 'cancelled')"
+    ),
+    ("courses", "bookings_total"): (
+        "UPDATE courses SET bookings_total = ("
+        "SELECT count(*) FROM subscriptions s WHERE s.course_id = courses.id)"
+    ),
+    ("courses", "bookings_pending"): (
+        "UPDATE courses SET bookings_pending = ("
+        "SELECT count(*) FROM subscriptions s "
+        "WHERE s.course_id = courses.id AND s.status = 'pending')"
+    ),
+    ("courses", "bookings_confirmed"): (
+        "UPDATE courses SET bookings_confirmed = ("
+        "SELECT count(*) FROM subscriptions s "
+        "WHERE s.course_id = courses.id AND s.status = 'confirmed')"
+    ),
+    ("courses", "bookings_cancelled"): (
+        "UPDATE courses SET bookings_cancelled = ("
+        "SELECT count(*) FROM subscriptions s "
+        "WHERE s.course_id = courses.id AND s.status = 'cancelled')"
+    ),
+}
+
+
+# Statements run once, right after the named table is created in an existing database
+TABLE_BACKFILLS = {
+    "daily_booking_stats": (
+        "INSERT INTO daily_booking_stats (day, bookings) "
+        "SELECT date(subscription_date), count(*) FROM subscriptions "
+        "WHERE subscription_date IS NOT NULL GROUP BY date(subscription_date)"
+    ),
+}
+
+
+# Statements run before the named unique index is built on an existing table,
+# removing the legacy duplicate rows that would block it
+INDEX_DEDUPES = {
+    "uq_subscriptions_user_course": (
+        # Keep the first booking of each user and course
+        "DELETE FROM subscriptions WHERE id NOT IN ("
+        "SELECT min(id) FROM subscriptions GROUP BY user_id, course_id)"
+    ),
+}
+
+
+class SchemaUpgradeError(RuntimeError):
+    """A unique index the application depends on could not be created."""
+
+
+def _create_missing_tables(engine):
+    """Create model tables that an existing database lacks, backfilling where needed."""
+    existing_tables = set(inspect(engine).get_table_names())
+
+    for table in db.metadata.sorted_tables:
+        if table.name in existing_tables:
+            continue
+        try:
+            with engine.begin() as conn:
+                table.create(bind=conn)
+                backfill = TABLE_BACKFILLS.get(table.name)
+                if backfill:
+                    conn.execute(text(backfill))
+            logger.info("Created table %s", table.name)
+        except SQLAlchemyError as e:
+            logger.warning("Could not create table %s: %s", table.name, e)
+
+
+def _add_missing_columns(engine):
+    """Add nullable or server-defaulted model columns that existing tables lack."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(ddl))
+                    backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                    if backfill:
+                        conn.execute(text(backfill))
+                logger.info("Added column %s.%s", table.name, column.name)
+            except SQLAlchemyError as e:
+                logger.warning("Could not add column %s.%s: %s", table.name, column.name, e)
+
+
+def _create_index(engine, index):
+    """
+    Create index if it is missing.
+
+    On PostgreSQL the index is built CONCURRENTLY, so a large table stays
+    writable while it builds; that cannot run inside a transaction, and a
+    failed build leaves an invalid index behind, which is dropped so the next
+    start tries again.
+
+    Tasks starting together would see each other's in-progress builds as
+    invalid, so the build runs under an advisory lock on the index name.
+    Another task holding it skips a plain index, and waits for a unique index
+    because writes depend on it.
+    """
+    # IF NOT EXISTS rather than checkfirst: reflection does not report
+    # expression indexes such as lower(email) on every backend
+    statement = CreateIndex(index, if_not_exists=True)
+    if engine.dialect.name != "postgresql":
+        with engine.begin() as conn:
+            conn.execute(statement)
+        return
+
+    ddl = re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX CONCURRENTLY ",
+                 str(statement.compile(dialect=engine.dialect)))
+    drop = f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        lock = "pg_advisory_lock" if index.unique else "pg_try_advisory_lock"
+        if conn.execute(text(f"SELECT {lock}(hashtext(:name))"), {"name": index.name}).scalar() is False:
+            logger.info("Index %s is being created by another process; skipping", index.name)
+            return
+        try:
+            # Only invalid because of a failed build now that no one else can be building it
+            invalid = conn.execute(
+                text("SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                     "WHERE c.relname = :name"),
+                {"name": index.name}
+            ).scalar()
+            if invalid:
+                conn.exec_driver_sql(drop)
+            try:
+                conn.exec_driver_sql(ddl)
+            except SQLAlchemyError:
+                conn.exec_driver_sql(drop)
+                raise
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": index.name})
+
+
+def _remove_duplicates(engine, index):
+    """Delete the rows blocking a unique index that does not exist yet, then fix the counters."""
+    if index.name in {i["name"] for i in inspect(engine).get_indexes(index.table.name)}:
+        return
+    with engine.begin() as conn:
+        removed = conn.execute(text(INDEX_DEDUPES[index.name])).rowcount
+    if removed:
+        logger.warning("Removed %s duplicate rows from %s before creating %s",
+                       removed, index.table.name, index.name)
+        # Course counters and daily totals still count the deleted rows
+        StatsService().rebuild_counters()
+
+
+def upgrade_schema(engine):
+    """
+    Bring an existing database up to date with app/models.py.
+
+    db.create_all() only runs on an empty database, so deployments created
+    before a table, column or index was added to the models are upgraded here:
+    missing tables and columns are added (and backfilled where needed), then
+    missing indexes are created (CONCURRENTLY on PostgreSQL, without blocking
+    writes to the table being indexed).
+    Each step runs on its own; one failure is logged and does not stop the
+    others. Unique indexes are the exception: writes rely on them (book_course
+    uses uq_subscriptions_user_course as its ON CONFLICT target), so duplicate
+    rows listed in INDEX_DEDUPES are removed first, and if the index still
+    cannot be built SchemaUpgradeError is raised.
+    """
+    _create_missing_tables(engine)
+    _add_missing_columns(engine)
+
+    for table in db.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            try:
+                if index.name in INDEX_DEDUPES:
+                    _remove_duplicates(engine, index)
+                _create_index(engine, index)
+            except (SQLAlchemyError, RuntimeError) as e:
+                if index.unique:
+                    raise SchemaUpgradeError(
+                        f"Could not create unique index {index.name} on {table.name}: {e}"
+                    ) from e
+                logger.warning("Could not create index %s on %s: %s", index.name, table.name, e)
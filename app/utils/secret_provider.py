@@ -0,0 +1,270 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSecretsClient:
+    """
+    Stand-in for the Secrets Manager client backed by a dict of secret name to value.
+
+    Used for local development (SECRETS_BACKEND=local) and in tests; values are
+    dicts or JSON strings, and can be replaced at any time to simulate rotation.
+    """
+
+    def __init__(self, secrets=None):
+        self.secrets = dict(secrets or {})
+        self.calls = 0
+
+    @classmethod
+    def from_json_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def get_secret_value(self, SecretId):
+        self.calls += 1
+        if SecretId not in self.secrets:
+            raise KeyError(f"Secret {SecretId} not found")
+        value = self.secrets[SecretId]
+        return {"SecretString": value if isinstance(value, str) else json.dumps(value)}
+
+
+class _CachedSecret:
+    __slots__ = ("value", "fetched_at", "refreshing")
+
+    def __init__(self, value, fetched_at):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.refreshing = False
+
+
+class SecretProvider:
+    """
+    Cached access to JSON secrets in AWS Secrets Manager (or a stand-in client).
+
+    - Secrets are cached for ttl seconds; one client is shared per process.
+    - Once a secret is older than ttl - refresh_ahead, reads still return the
+      cached value while a background thread fetches the new one.
+    - After expiry the last value keeps being served at once for up to
+      max_stale more seconds (stale-while-revalidate), while the background
+      refresh retries; only then do reads fetch synchronously.
+    - Failed fetches back off exponentially (retry_backoff doubling up to
+      max_retry_backoff), so an outage does not turn every read into an API call.
+    """
+
+    def __init__(self, client=None, region_name=None, ttl=300, refresh_ahead=60, max_stale=3600,
+                 retry_backoff=5, max_retry_backoff=300, clock=time.monotonic):
+        """
+        :param client: Object with get_secret_value(SecretId=...); created from boto3 when omitted.
+        :param region_name: AWS region for the boto3 client.
+        """
+        self.region_name = region_name
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.max_stale = max_stale
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.clock = clock
+        # Secret name -> (consecutive failures, time of the last one, error)
+        self._failures = {}
+        self._client = client
+        self._client_pid = os.getpid() if client is not None else None
+        self._injected_client = client is not None
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+
+    def configure(self, client=None, region_name=None, ttl=None, refresh_ahead=None, max_stale=None):
+        """Change the settings or client; cached secrets are dropped."""
+        with self._lock:
+            if region_name is not None:
+                self.region_name = region_name
+            if ttl is not None:
+                self.ttl = ttl
+            if refresh_ahead is not None:
+                self.refresh_ahead = refresh_ahead
+            if max_stale is not None:
+                self.max_stale = max_stale
+            self._client = client
+            self._client_pid = os.getpid() if client is not None else None
+            self._injected_client = client is not None
+            self._cache.clear()
+            self._failures.clear()
+
+    @property
+    def client(self):
+        # boto3 clients are not fork-safe; each worker process builds its own
+        if self._client is None or (not self._injected_client and self._client_pid != os.getpid()):
+            with self._lock:
+                if self._client is None or (not self._injected_client and self._client_pid != os.getpid()):
+                    import boto3
+                    self._client = boto3.session.Session().client(
+                        service_name="secretsmanager", region_name=self.region_name
+                    )
+                    self._client_pid = os.getpid()
+        return self._client
+
+    def _fetch(self, name):
+        response = self.client.get_secret_value(SecretId=name)
+        return json.loads(response["SecretString"])
+
+    def _fetch_and_store(self, name):
+        """Fetch name and cache it, recording the failure for backoff if it fails."""
+        try:
+            value = self._fetch(name)
+        except Exception as e:
+            count = self._failures.get(name, (0, None, None))[0] + 1
+            self._failures[name] = (count, self.clock(), e)
+            raise
+        self._failures.pop(name, None)
+        return self._store(name, value)
+
+    def _backoff_error(self, name):
+        """Return the last error if name failed too recently to try again, else None."""
+        failure = self._failures.get(name)
+        if failure is None:
+            return None
+        count, failed_at, error = failure
+        delay = min(self.retry_backoff * 2 ** (count - 1), self.max_retry_backoff)
+        return error if self.clock() - failed_at < delay else None
+
+    def _fetch_lock(self, name):
+        with self._lock:
+            return self._fetch_locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """
+        Return the secret name as a dict.
+
+        :raises RuntimeError: If the secret cannot be fetched and no usable cached value exists.
+        """
+        entry = self._cache.get(name)
+        if entry is not None:
+            age = self.clock() - entry.fetched_at
+            if age < self.ttl + self.max_stale:
+                if age >= self.ttl - self.refresh_ahead:
+                    self._refresh_in_background(name, entry)
+                return entry.value
+
+        with self._fetch_lock(name):
+            # Another thread may have fetched it while this one waited
+            current = self._cache.get(name)
+            if current is not None and current is not entry and self.clock() - current.fetched_at < self.ttl:
+                return current.value
+            error = self._backoff_error(name)
+            if error is not None:
+                raise RuntimeError(f"Error retrieving secret: {error}")
+            try:
+                return self._fetch_and_store(name)
+            except Exception as e:
+                raise RuntimeError(f"Error retrieving secret: {e}") from e
+
+    def refresh(self, name):
+        """
+        Fetch name now, bypassing the cache (e.g. after credentials were rotated).
+
+        :raises RuntimeError: If the secret cannot be fetched.
+        """
+        with self._fetch_lock(name):
+            error = self._backoff_error(name)
+            if error is not None:
+                raise RuntimeError(f"Error retrieving secret: {error}")
+            try:
+                return self._fetch_and_store(name)
+            except Exception as e:
+                raise RuntimeError(f"Error retrieving secret: {e}") from e
+
+    def invalidate(self, name=None):
+        """Drop one cached secret, or all of them."""
+        with self._lock:
+            if name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(name, None)
+
+    def _store(self, name, value):
+        self._cache[name] = _CachedSecret(value, self.clock())
+        return value
+
+    def _refresh_in_background(self, name, entry):
+        with self._lock:
+            if entry.refreshing or self._backoff_error(name) is not None:
+                return
+            entry.refreshing = True
+        thread = threading.Thread(
+            target=self._background_refresh, args=(name, entry), name=f"secret-refresh-{name}", daemon=True
+        )
+        thread.start()
+
+    def _background_refresh(self, name, entry):
+        try:
+            with self._fetch_lock(name):
+                if self._cache.get(name) is entry:
+                    self._fetch_and_store(name)
+        except Exception as e:
+            # The cached value stays in use; the next get() after the backoff retries
+            logger.warning("Background refresh of secret %s failed: %s", name, e)
+        finally:
+            entry.refreshing = False
+
+
+@functools.lru_cache(maxsize=None)
+def get_secret_provider():
+    """The provider shared by the whole process; built on first use and configured by init_secrets()."""
+    return SecretProvider(region_name=os.getenv("SECRETS_REGION", "eu-west-1"))
+
+
+def init_secrets(app):
+    """Apply the secret provider settings from the app config."""
+    client = None
+    if app.config.get("SECRETS_BACKEND", "aws") == "local":
+        local_file = app.config.get("SECRETS_LOCAL_FILE")
+        client = LocalSecretsClient.from_json_file(local_file) if local_file else LocalSecretsClient()
+    get_secret_provider().configure(
+        client=client,
+        region_name=app.config.get("SECRETS_REGION", "eu-west-1"),
+        ttl=app.config.get("SECRETS_TTL", 300),
+        refresh_ahead=app.config.get("SECRETS_REFRESH_AHEAD", 60),
+        max_stale=app.config.get("SECRETS_MAX_STALE", 3600),
+    )
+
+
+def use_db_credentials(engine, secret_name, provider=None):
+    """
+    Take the username and password of every new connection from a secret.
+
+    Credentials are read from the provider's cache each time the pool opens a
+    connection, so rotated values are picked up without restarting. If a
+    connection attempt fails, the secret is fetched again and, when it has
+    changed (the password was just rotated), the attempt is retried once.
+    """
+    from sqlalchemy import event
+
+    provider = provider or get_secret_provider()
+
+    def apply(cparams, secret):
+        if "username" in secret:
+            cparams["user"] = secret["username"]
+        if "password" in secret:
+            cparams["password"] = secret["password"]
+
+    @event.listens_for(engine, "do_connect")
+    def connect_with_secret(dialect, connection_record, cargs, cparams):
+        secret = provider.get(secret_name)
+        apply(cparams, secret)
+        try:
+            return dialect.connect(*cargs, **cparams)
+        except Exception:
+            try:
+                rotated = provider.refresh(secret_name)
+            except RuntimeError:
+                rotated = secret
+            if rotated == secret:
+                raise
+            logger.info("Database credentials in %s changed; reconnecting with the new ones", secret_name)
+            apply(cparams, rotated)
+            return dialect.connect(*cargs, **cparams)
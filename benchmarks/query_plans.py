@@ -0,0 +1,160 @@
+"""
+Compare query plans and timings of the hot subscription queries without and
+with the indexes declared in app/models.py.
+
+Usage:
+    python benchmarks/query_plans.py [--subscriptions 1000000] [--database-url URL]
+
+The default database is a throwaway SQLite file. Pass a PostgreSQL URL to
+benchmark a real server (its tables are dropped and recreated).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask
+from sqlalchemy import select, text, tuple_
+
+from app.models import db, User, Course, Module, CourseModule, Subscriptions
+from app.services.admin_service import AdminService
+from app.utils.schema import upgrade_schema
+
+# Indexes added for the hot subscription/course_module queries
+BENCHMARKED_INDEXES = [
+    "ix_subscriptions_course_status_date",
+    "ix_subscriptions_date_id",
+    "ix_subscriptions_course_date_id",
+    "ix_course_modules_course_id",
+    "ix_course_modules_module_id",
+]
+
+CHUNK_SIZE = 50000
+
+
+def seed(n_users, n_courses, n_subscriptions):
+    """Bulk insert a synthetic dataset; one booking per (user, course) pair."""
+    print(f"Seeding {n_users} users, {n_courses} courses, {n_subscriptions} subscriptions...")
+    db.session.execute(User.__table__.insert(), [
+        {"first_name": f"User{i}", "second_name": "Bench", "email": f"user{i}@bench.local",
+         "password_hash": "x", "role": "customer"}
+        for i in range(n_users)
+    ])
+    db.session.execute(Course.__table__.insert(), [
+        {"name": f"Course {i}", "description": "Benchmark course", "price": 100.0, "seats_booked": 0}
+        for i in range(n_courses)
+    ])
+    db.session.execute(Module.__table__.insert(), [
+        {"title": f"Module {i}", "description": "Benchmark module"} for i in range(n_courses * 5)
+    ])
+    db.session.execute(CourseModule.__table__.insert(), [
+        {"course_id": i // 5 + 1, "module_id": i + 1} for i in range(n_courses * 5)
+    ])
+
+    statuses = ["pending", "confirmed", "cancelled"]
+    start = datetime(2024, 1, 1)
+    # Walk (user, course) pairs in a shuffled course order so the unique index holds
+    for offset in range(0, n_subscriptions, CHUNK_SIZE):
+        rows = []
+        for i in range(offset, min(offset + CHUNK_SIZE, n_subscriptions)):
+            rows.append({
+                "user_id": i % n_users + 1,
+                "course_id": (i // n_users) % n_courses + 1,
+                "status": random.choice(statuses),
+                "special_requests": "",
+                "subscription_date": start + timedelta(seconds=random.randint(0, 365 * 86400)),
+            })
+        db.session.execute(Subscriptions.__table__.insert(), rows)
+    db.session.commit()
+
+
+def hot_queries(user_id, course_id):
+    """The statements behind the service-layer hot paths."""
+    service = AdminService()
+    newest = (datetime(2024, 7, 1), 10 ** 9)
+    return {
+        "UserService.get_user_bookings": select(Subscriptions.id, Course.name)
+            .join(Course, Subscriptions.course_id == Course.id)
+            .where(Subscriptions.user_id == user_id),
+        "AdminService.get_all_bookings (page 2)": service._bookings_query()
+            .filter(tuple_(Subscriptions.subscription_date, Subscriptions.id) < tuple_(*newest))
+            .order_by(Subscriptions.subscription_date.desc(), Subscriptions.id.desc())
+            .limit(51).statement,
+        "AdminService.get_bookings_by_course": service._bookings_query(course_id)
+            .order_by(Subscriptions.subscription_date.desc(), Subscriptions.id.desc())
+            .limit(51).statement,
+        "Admin filter course+status by date": service._bookings_query(course_id, status="pending")
+            .order_by(Subscriptions.subscription_date.desc())
+            .limit(51).statement,
+        "Catalog course_modules join": select(CourseModule.module_id)
+            .where(CourseModule.course_id == course_id),
+    }
+
+
+def explain_and_time(label, statement, repeat=5):
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if dialect.name == "sqlite" else "EXPLAIN "
+    plan = [" | ".join(str(col) for col in row) for row in db.session.execute(text(prefix + sql))]
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        db.session.execute(statement).all()
+    elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+
+    print(f"\n  {label}: {elapsed_ms:.2f} ms")
+    for line in plan:
+        print(f"      {line}")
+
+
+def run(args):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = args.database_url
+    db.init_app(app)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        # Start from the pre-index schema, then seed
+        for name in BENCHMARKED_INDEXES:
+            db.session.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        db.session.commit()
+
+        started = time.perf_counter()
+        seed(args.users, args.courses, args.subscriptions)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+        queries = hot_queries(user_id=args.users // 2, course_id=args.courses // 2)
+
+        print("\n=== BEFORE (without new indexes) ===")
+        for label, statement in queries.items():
+            explain_and_time(label, statement)
+
+        # End the read transaction first; PostgreSQL builds the indexes CONCURRENTLY
+        db.session.commit()
+        started = time.perf_counter()
+        upgrade_schema(db.engine)
+        if db.engine.dialect.name == "sqlite":
+            db.session.execute(text("ANALYZE"))
+        else:
+            db.session.execute(text("ANALYZE subscriptions"))
+            db.session.execute(text("ANALYZE course_modules"))
+        db.session.commit()
+        print(f"\nupgrade_schema() created indexes in {time.perf_counter() - started:.1f}s")
+
+        print("\n=== AFTER (with new indexes) ===")
+        for label, statement in queries.items():
+            explain_and_time(label, statement)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscriptions", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--courses", type=int, default=200)
+    parser.add_argument("--database-url", default="sqlite:///query_plans_bench.db")
+    run(parser.parse_args())
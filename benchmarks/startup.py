@@ -0,0 +1,84 @@
+"""
+Measure cold start: from `import app` to the first served request.
+
+Every run is a fresh interpreter, so module imports, config loading,
+create_app() and the first request are all paid again, as in a new worker.
+
+Usage:
+    python benchmarks/startup.py [--runs 10] [--env testing] [--path /public/home] [--diagnostics]
+
+The default "testing" environment uses in-memory SQLite, so no database
+server is needed. Pass --env development2 (with DB_* set) to include a real
+connection. --diagnostics turns STARTUP_DIAGNOSTICS on for comparison.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PHASES = ["import", "create_app", "first_request", "total"]
+
+
+def child(path):
+    """Runs inside the fresh interpreter; prints the phase timings as JSON."""
+    sys.path.insert(0, ROOT)
+    started = time.perf_counter()
+
+    import app
+
+    imported = time.perf_counter()
+    flask_app = app.create_app()
+    created = time.perf_counter()
+    response = flask_app.test_client().get(path)
+    served = time.perf_counter()
+
+    print(json.dumps({
+        "status": response.status_code,
+        "import": imported - started,
+        "create_app": created - imported,
+        "first_request": served - created,
+        "total": served - started,
+        "boto3_loaded": "boto3" in sys.modules,
+    }))
+
+
+def run(args):
+    env = dict(os.environ, FLASK_ENV=args.env, STARTUP_DIAGNOSTICS="true" if args.diagnostics else "false")
+    print(f"Cold-starting {args.runs} times (FLASK_ENV={args.env}, diagnostics={args.diagnostics}, GET {args.path})...")
+
+    results = []
+    for _ in range(args.runs):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--path", args.path],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            print(completed.stderr)
+            raise RuntimeError("Startup run failed.")
+        # Startup output (diagnostics, logging) precedes the timings on the last line
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print(f"First response status: {results[0]['status']}, boto3 imported: {results[0]['boto3_loaded']}")
+    print(f"{'phase':<15}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for phase in PHASES:
+        timings = [r[phase] * 1000 for r in results]
+        print(f"{phase:<15}{statistics.median(timings):>12.1f}{min(timings):>10.1f}{max(timings):>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--env", default="testing")
+    parser.add_argument("--path", default="/public/home")
+    parser.add_argument("--diagnostics", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.path)
+    else:
+        run(args)
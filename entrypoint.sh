@@ -3,7 +3,8 @@
 # Exit script on any error
 set -e
 
-export FLASK_ENV=development2
+# Keep the environment chosen for the container; default to the AWS development database
+export FLASK_ENV=${FLASK_ENV:-development2}
 
 # Debug: List contents of /app and /app/app
 echo "📂 Current contents of /app:"
@@ -20,6 +21,11 @@ else
     exit 1
 fi
 
-# Start the Flask app
-echo "🚀 Starting Flask application..."
-exec python /app/run.py
+# Start the Flask app: gunicorn in production, the development server otherwise
+if [ "$FLASK_ENV" = "production" ]; then
+    echo "🚀 Starting Flask application with gunicorn..."
+    exec gunicorn --config /app/gunicorn.conf.py --chdir /app wsgi:app
+else
+    echo "🚀 Starting Flask application (development server)..."
+    exec python /app/run.py
+fi
@@ -0,0 +1,47 @@
+# Gunicorn settings for the production container (selected by entrypoint.sh).
+# Every value can be overridden through the environment.
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Pre-fork workers, each serving requests on a pool of threads
+worker_class = "gthread"
+workers = int(os.getenv("WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("WEB_THREADS", "4"))
+
+# Seconds a silent worker may run before being restarted, seconds allowed to
+# finish in-flight requests on shutdown/reload, and idle keep-alive seconds
+timeout = int(os.getenv("WEB_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("WEB_KEEPALIVE", "5"))
+
+# Recycle workers now and then to bound slow memory growth (0 disables)
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", "0"))
+
+# Build the app once in the master so workers share its memory copy-on-write
+preload_app = True
+
+accesslog = os.getenv("WEB_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("WEB_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    """Move objects created while loading the app out of GC tracking before forking.
+
+    Otherwise the first collection in each worker touches every object header
+    and un-shares the pages copied from the master.
+    """
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master; each worker opens its own."""
+    from app.models import db
+
+    with server.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -1,22 +1,31 @@
 import os
 import sys
+import csv
+import io
+import time
+import random
 import logging
-import boto3
+import argparse
+from itertools import accumulate, islice
 from flask import Flask
-from datetime import date
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, text
+from werkzeug.security import generate_password_hash
 
 # Ensure the project root (containing the "app" package) is on the PYTHONPATH
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
-from app.config import config  # Import configurations
-from app.models import db, User, Course, Module, CourseModule, Subscriptions  # Import models
+from app.config import load_config  # Import configurations
+from app.models import db, User, Course, Module, CourseModule, Subscriptions, DailyBookingStats  # Import models
+from app.services.search_service import SearchService
+from app.services.stats_service import StatsService
+from app.utils.cloudwatch_logging import CloudWatchLogHandler
+from app.utils.schema import upgrade_schema
 
 # Flask app configuration
 env = os.getenv("FLASK_ENV", "development")  # Determine environment (default: development)
-app_config = config[env]  # Load configuration based on environment
-
 app = Flask(__name__)
-app.config.from_object(app_config)
+app.config.from_mapping(load_config(env))  # Load configuration based on environment
 
 # Initialize the database with the Flask app
 db.init_app(app)
@@ -24,43 +33,14 @@ db.init_app(app)
 # CloudWatch Configuration
 LOG_GROUP_NAME = "/ecs/flask-app-service"
 LOG_STREAM_NAME = f"database_seeding-{date.today().isoformat()}"  # Custom log stream for database seeding
-session = boto3.Session(region_name="eu-west-1")  # Replace with your region (e.g., "us-east-1")
-logs_client = session.client('logs')
-
-# Create the log group (if it doesn't already exist)
-try:
-    logs_client.create_log_group(logGroupName=LOG_GROUP_NAME)
-except logs_client.exceptions.ResourceAlreadyExistsException:
-    pass  # Log group already exists
-
-# Create the log stream (if it doesn't already exist)
-try:
-    logs_client.create_log_stream(logGroupName=LOG_GROUP_NAME, logStreamName=LOG_STREAM_NAME)
-except logs_client.exceptions.ResourceAlreadyExistsException:
-    pass  # Log stream already exists
-
-class CloudWatchHandler(logging.Handler):
-    """Custom logging handler for sending logs to CloudWatch."""
-    def emit(self, record):
-        log_entry = self.format(record)
-        try:
-            logs_client.put_log_events(
-                logGroupName=LOG_GROUP_NAME,
-                logStreamName=LOG_STREAM_NAME,
-                logEvents=[
-                    {
-                        'timestamp': int(record.created * 1000),  # Convert to milliseconds
-                        'message': log_entry
-                    }
-                ]
-            )
-        except Exception as e:
-            print(f"❌ Failed to log to CloudWatch: {e}")
+CLOUDWATCH_REGION = "eu-west-1"  # Replace with your region (e.g., "us-east-1")
 
-# Logger for database seeding operations
+# Logger for database seeding operations; records are batched and shipped in the
+# background, and whatever is left is sent when logging shuts down at exit.
+# The log group and stream are created on the first send if they don't exist.
 seeding_logger = logging.getLogger('database_seeding')
 seeding_logger.setLevel(logging.INFO)
-seeding_logger.addHandler(CloudWatchHandler())
+seeding_logger.addHandler(CloudWatchLogHandler(LOG_GROUP_NAME, LOG_STREAM_NAME, region_name=CLOUDWATCH_REGION))
 
 # Seed database function
 def seed_database():
@@ -70,6 +50,7 @@ def seed_database():
             # Clear existing data
             try:
                 db.session.query(Subscriptions).delete()
+                db.session.query(DailyBookingStats).delete()
                 db.session.query(CourseModule).delete()
                 db.session.query(Module).delete()
                 db.session.query(Course).delete()
@@ -175,6 +156,14 @@ def seed_database():
                 seeding_logger.error(f"❌ Failed to add subscriptions: {e}")
                 return
 
+            # The subscriptions above bypass book_course, so derive the course counters and daily totals
+            try:
+                StatsService().rebuild_counters()
+                seeding_logger.info("✅ Booking counters rebuilt.")
+            except Exception as e:
+                seeding_logger.error(f"❌ Failed to rebuild booking counters: {e}")
+                return
+
             # Success log
             seeding_logger.info("✅ Database seeding completed successfully!")
             print("✅ Database seeding completed successfully!")
@@ -184,5 +173,220 @@ def seed_database():
             print(f"❌ Unexpected error during database seeding: {e}")
 
 
+# Synthetic data for load testing
+SYNTHETIC_PASSWORD = "password123"
+FIRST_NAMES = ["Hayao", "Isao", "Yoshifumi", "Hiromasa", "Goro", "Toshio", "Joe", "Mamoru", "Satoshi", "Makoto",
+               "Naoko", "Akiko", "Yuki", "Hana", "Sora", "Ren", "Mei", "Kiki", "Chihiro", "Sophie"]
+SECOND_NAMES = ["Miyazaki", "Takahata", "Kondo", "Yonebayashi", "Suzuki", "Hisaishi", "Oshii", "Kon", "Shinkai",
+                "Yamada", "Tanaka", "Sato", "Watanabe", "Ito", "Nakamura", "Kobayashi", "Kato", "Yoshida"]
+COURSE_TOPICS = ["Animation", "Storyboarding", "Character Design", "Background Painting", "Sound Design",
+                 "Voice Acting", "Compositing", "Colour Grading", "Screenwriting", "Stop Motion", "3D Modelling",
+                 "Editing", "Cinematography", "Lighting", "Visual Effects"]
+COURSE_LEVELS = ["Introduction to", "Foundations of", "Intermediate", "Advanced", "Masterclass in"]
+# Share of bookings in each status
+SUBSCRIPTION_STATUSES = {"confirmed": 0.6, "pending": 0.3, "cancelled": 0.1}
+SPECIAL_REQUESTS = ["Need extra animation tools.", "Would love a Q&A with the instructor.",
+                    "Prefer digital sketching over hand-drawn.", "Need subtitles for better understanding."]
+
+
+def _chunks(rows, size):
+    """Split an iterator of rows into lists of at most size rows."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _copy_rows(connection, table, columns, chunk):
+    """Load one chunk with PostgreSQL COPY, inside the connection's transaction."""
+    buffer = io.StringIO()
+    # Unquoted empty CSV fields load as NULL
+    csv.writer(buffer).writerows(chunk)
+    buffer.seek(0)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _write_rows(connection, table, columns, rows, chunk_size):
+    """
+    Write rows (tuples in columns order) in chunks of chunk_size.
+
+    PostgreSQL uses COPY; other databases use one executemany INSERT per chunk.
+    :return: Number of rows written.
+    """
+    use_copy = connection.dialect.name == "postgresql"
+    written = 0
+    for chunk in _chunks(rows, chunk_size):
+        if use_copy:
+            _copy_rows(connection, table, columns, chunk)
+        else:
+            connection.execute(table.insert(), [dict(zip(columns, row)) for row in chunk])
+        written += len(chunk)
+    return written
+
+
+def _zipf_cum_weights(n, exponent):
+    """Cumulative weights for ranks 1..n, rank k having weight 1 / k ** exponent."""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+
+
+def _generate_users(n_users, password_hash):
+    # Admin first, so it keeps the familiar login
+    yield 1, "Studio", "Ghibli Admin", "admin@ghibli.com", password_hash, "admin"
+    for user_id in range(2, n_users + 1):
+        yield (user_id, FIRST_NAMES[user_id % len(FIRST_NAMES)], SECOND_NAMES[user_id // len(FIRST_NAMES) % len(SECOND_NAMES)],
+               f"user{user_id}@synthetic.example.com", password_hash, "customer")
+
+
+def _generate_courses(n_courses, rng):
+    for course_id in range(1, n_courses + 1):
+        topic = COURSE_TOPICS[course_id % len(COURSE_TOPICS)]
+        level = COURSE_LEVELS[course_id // len(COURSE_TOPICS) % len(COURSE_LEVELS)]
+        yield (course_id, f"{level} {topic} {course_id}", f"A hands-on {topic.lower()} course for film makers.",
+               float(rng.randrange(50, 500, 10)), None)
+
+
+def _generate_modules(n_modules):
+    for module_id in range(1, n_modules + 1):
+        topic = COURSE_TOPICS[module_id % len(COURSE_TOPICS)]
+        yield module_id, f"{topic} Module {module_id}", f"Practical {topic.lower()} exercises."
+
+
+def _generate_course_modules(n_courses, n_modules, rng):
+    """Give every course 3 to 8 distinct modules."""
+    for course_id in range(1, n_courses + 1):
+        for module_id in rng.sample(range(1, n_modules + 1), min(n_modules, rng.randint(3, 8))):
+            yield course_id, module_id
+
+
+def _generate_subscriptions(n_subscriptions, n_users, n_courses, rng, days, zipf_exponent, chunk_size):
+    """
+    Yield n_subscriptions distinct (user, course) bookings.
+
+    Course popularity follows a Zipf distribution over a shuffled course order,
+    customers are picked uniformly, and booking dates lean towards the recent
+    end of the last `days` days.
+    """
+    customers = range(2, n_users + 1)
+    by_popularity = list(range(1, n_courses + 1))
+    rng.shuffle(by_popularity)
+    course_weights = _zipf_cum_weights(n_courses, zipf_exponent)
+    statuses = list(SUBSCRIPTION_STATUSES)
+    status_weights = list(accumulate(SUBSCRIPTION_STATUSES.values()))
+    now = datetime.utcnow().replace(microsecond=0)
+    span = days * 86400
+
+    seen = set()
+    produced = attempts = 0
+    while produced < n_subscriptions:
+        batch = min(chunk_size, n_subscriptions - produced)
+        attempts += batch
+        if attempts > 20 * n_subscriptions:
+            raise ValueError("Too many duplicate (user, course) pairs; add users or courses, or lower the Zipf exponent.")
+        users = rng.choices(customers, k=batch)
+        courses = rng.choices(by_popularity, cum_weights=course_weights, k=batch)
+        booking_statuses = rng.choices(statuses, cum_weights=status_weights, k=batch)
+        for user_id, course_id, status in zip(users, courses, booking_statuses):
+            pair = user_id * (n_courses + 1) + course_id
+            if pair in seen:
+                continue
+            seen.add(pair)
+            produced += 1
+            subscription_date = now - timedelta(seconds=int(rng.triangular(0, span, 0)))
+            special_requests = rng.choice(SPECIAL_REQUESTS) if rng.random() < 0.05 else None
+            yield user_id, course_id, status, subscription_date, special_requests
+
+
+def _clear_synthetic_tables(connection):
+    tables = [Subscriptions, CourseModule, Module, Course, User, DailyBookingStats]
+    if connection.dialect.name == "postgresql":
+        names = ", ".join(model.__tablename__ for model in tables)
+        connection.execute(text(f"TRUNCATE {names} RESTART IDENTITY"))
+    else:
+        for model in tables:
+            connection.execute(delete(model))
+
+
+def _reset_sequences(connection):
+    # Rows were written with explicit ids; move the id sequences past them
+    for model in (User, Course, Module, CourseModule, Subscriptions):
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{model.__tablename__}', 'id'), "
+            f"coalesce((SELECT max(id) FROM {model.__tablename__}), 0) + 1, false)"
+        ))
+
+
+def seed_synthetic(users=200000, courses=500, modules=2000, subscriptions=1000000, days=365,
+                   zipf_exponent=1.1, chunk_size=50000, random_seed=None):
+    """
+    Replace the data with a large synthetic dataset for load testing.
+
+    Everything is written in one transaction with chunked bulk inserts (COPY on
+    PostgreSQL). All users share one password hash computed up front, and the
+    booking counters, daily totals and search index are rebuilt at the end.
+
+    :param users: Number of users, including the admin (admin@ghibli.com).
+    :param subscriptions: Number of bookings; each (user, course) pair is booked at most once.
+    :param zipf_exponent: Skew of course popularity; higher puts more bookings on the top courses.
+    :param random_seed: Seed for a reproducible dataset.
+    """
+    rng = random.Random(random_seed)
+    started = time.perf_counter()
+    seeding_logger.info("Seeding synthetic data: %s users, %s courses, %s modules, %s subscriptions...",
+                        users, courses, modules, subscriptions)
+
+    with app.app_context():
+        db.create_all()
+        upgrade_schema(db.engine)
+
+        password_hash = generate_password_hash(SYNTHETIC_PASSWORD)
+        with db.engine.begin() as connection:
+            _clear_synthetic_tables(connection)
+            steps = [
+                (User, ["id", "first_name", "second_name", "email", "password_hash", "role"],
+                 _generate_users(users, password_hash)),
+                (Course, ["id", "name", "description", "price", "capacity"], _generate_courses(courses, rng)),
+                (Module, ["id", "title", "description"], _generate_modules(modules)),
+                (CourseModule, ["course_id", "module_id"], _generate_course_modules(courses, modules, rng)),
+                (Subscriptions, ["user_id", "course_id", "status", "subscription_date", "special_requests"],
+                 _generate_subscriptions(subscriptions, users, courses, rng, days, zipf_exponent, chunk_size)),
+            ]
+            for model, columns, rows in steps:
+                step_started = time.perf_counter()
+                written = _write_rows(connection, model.__table__, columns, rows, chunk_size)
+                seeding_logger.info("✅ Wrote %s rows to %s in %.1fs.",
+                                    written, model.__tablename__, time.perf_counter() - step_started)
+            if connection.dialect.name == "postgresql":
+                _reset_sequences(connection)
+                connection.execute(text("ANALYZE"))
+
+        StatsService().rebuild_counters()
+        SearchService().ensure_schema()
+        SearchService().reindex_all()
+
+    elapsed = time.perf_counter() - started
+    seeding_logger.info("✅ Synthetic seeding completed in %.1fs.", elapsed)
+    print(f"✅ Synthetic seeding completed in {elapsed:.1f}s.")
+
+
 if __name__ == "__main__":
-    seed_database()
+    parser = argparse.ArgumentParser(description="Seed the database with demo data, or a large synthetic dataset.")
+    parser.add_argument("--synthetic", action="store_true", help="Generate a large dataset for load testing.")
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--modules", type=int, default=2000)
+    parser.add_argument("--subscriptions", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=365, help="Spread booking dates over this many days.")
+    parser.add_argument("--zipf-exponent", type=float, default=1.1)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--random-seed", type=int)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        seed_synthetic(users=args.users, courses=args.courses, modules=args.modules,
+                       subscriptions=args.subscriptions, days=args.days, zipf_exponent=args.zipf_exponent,
+                       chunk_size=args.chunk_size, random_seed=args.random_seed)
+    else:
+        seed_database()
@@ -0,0 +1,60 @@
+import os
+import threading
+from collections import Counter
+
+import pytest
+
+os.environ.setdefault("FLASK_ENV", "testing")
+
+from app import create_app
+from app.config import TestingConfig
+from app.models import db, User, Course, Subscriptions
+from app.services.user_service import UserService, BOOKED, SOLD_OUT
+
+CAPACITY = 5
+CUSTOMERS = 40
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """The app on a SQLite file, so each thread books on its own connection."""
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'bookings.db'}")
+    # Writers queue on the database lock instead of failing with "database is locked"
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_ENGINE_OPTIONS", {"connect_args": {"timeout": 30}},
+                        raising=False)
+    app = create_app()
+    with app.app_context():
+        course = Course(name="Small Course", description="", price=10.0, capacity=CAPACITY)
+        db.session.add(course)
+        db.session.add_all([
+            User(first_name="User", second_name=str(i), email=f"capacity{i}@example.com", password_hash="x")
+            for i in range(CUSTOMERS)
+        ])
+        db.session.commit()
+        user_ids = [user.id for user in db.session.query(User).order_by(User.id)]
+        yield app, course.id, user_ids
+        db.session.remove()
+
+
+def test_parallel_bookings_never_oversell(file_app):
+    app, course_id, user_ids = file_app
+    start = threading.Barrier(len(user_ids))
+    results = []
+
+    def book(user_id):
+        with app.app_context():
+            start.wait()
+            results.append(UserService().book_course(user_id, course_id))
+            db.session.remove()
+
+    threads = [threading.Thread(target=book, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Counter(results) == {BOOKED: CAPACITY, SOLD_OUT: CUSTOMERS - CAPACITY}
+    with app.app_context():
+        course = db.session.get(Course, course_id)
+        assert course.seats_booked == CAPACITY
+        assert db.session.query(Subscriptions).filter_by(course_id=course_id).count() == CAPACITY
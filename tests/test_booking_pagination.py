@@ -0,0 +1,60 @@
+import os
+
+import pytest
+from sqlalchemy import text
+
+os.environ.setdefault("FLASK_ENV", "testing")
+
+from app import create_app
+from app.models import db, User, Course
+from app.services.admin_service import AdminService
+
+
+@pytest.fixture
+def admin_service():
+    app = create_app()
+    with app.app_context():
+        db.session.query(User).delete()
+        db.session.query(Course).delete()
+        db.session.execute(text("DELETE FROM subscriptions"))
+        course = Course(name="Tied Course", description="", price=10.0)
+        db.session.add(course)
+        users = [
+            User(first_name="User", second_name=str(i), email=f"tied{i}@example.com", password_hash="x")
+            for i in range(30)
+        ]
+        db.session.add_all(users)
+        db.session.flush()
+        # Same second for every booking, in the text format CURRENT_TIMESTAMP stores
+        for user in users:
+            db.session.execute(
+                text("INSERT INTO subscriptions (user_id, course_id, status, subscription_date) "
+                     "VALUES (:user_id, :course_id, 'pending', '2024-05-01 10:00:00')"),
+                {"user_id": user.id, "course_id": course.id},
+            )
+        db.session.commit()
+        yield AdminService()
+        db.session.remove()
+
+
+def test_pages_move_past_tied_timestamps(admin_service):
+    seen = []
+    cursor = None
+    for _ in range(10):
+        page = admin_service.get_all_bookings(cursor=cursor, page_size=7)
+        seen.extend(b["booking_id"] for b in page["bookings"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 30
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_prev_returns_the_previous_page_with_tied_timestamps(admin_service):
+    first = admin_service.get_all_bookings(page_size=7)
+    second = admin_service.get_all_bookings(cursor=first["next_cursor"], page_size=7)
+    back = admin_service.get_all_bookings(cursor=second["prev_cursor"], direction="prev", page_size=7)
+
+    assert [b["booking_id"] for b in back["bookings"]] == [b["booking_id"] for b in first["bookings"]]
+    assert set(b["booking_id"] for b in second["bookings"]).isdisjoint(b["booking_id"] for b in first["bookings"])
@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from app.utils.cloudwatch_logging import CloudWatchLogHandler
+
+
+class ThrottlingError(Exception):
+    """Shaped like a botocore ClientError."""
+
+    def __init__(self):
+        super().__init__("Rate exceeded")
+        self.response = {"Error": {"Code": "ThrottlingException"}}
+
+
+class StubLogsClient:
+    """Local stand-in for the CloudWatch Logs client; records every PutLogEvents call."""
+
+    class exceptions:
+        class ResourceAlreadyExistsException(Exception):
+            pass
+
+    def __init__(self, throttle=0):
+        self.throttle = throttle
+        self.batches = []
+        self.attempts = []
+        self.lock = threading.Lock()
+
+    def create_log_group(self, logGroupName):
+        pass
+
+    def create_log_stream(self, logGroupName, logStreamName):
+        pass
+
+    def put_log_events(self, logGroupName, logStreamName, logEvents):
+        with self.lock:
+            self.attempts.append(time.monotonic())
+            if self.throttle:
+                self.throttle -= 1
+                raise ThrottlingError()
+            self.batches.append([event["message"] for event in logEvents])
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def make_logger():
+    handlers = []
+
+    def make(client, **kwargs):
+        handler = CloudWatchLogHandler("group", "stream", client=client, **kwargs)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handlers.append(handler)
+        log = logging.getLogger(f"cloudwatch-test-{len(handlers)}")
+        log.propagate = False
+        log.setLevel(logging.INFO)
+        log.handlers[:] = [handler]
+        return log, handler
+
+    yield make
+    for handler in handlers:
+        handler.close()
+
+
+def test_flushes_when_the_batch_count_is_reached(make_logger):
+    client = StubLogsClient()
+    log, _ = make_logger(client, flush_interval=60, max_batch_count=10)
+
+    for i in range(25):
+        log.info("event %s", i)
+
+    assert wait_for(lambda: sum(map(len, client.batches)) >= 20)
+    assert all(len(batch) <= 10 for batch in client.batches)
+
+
+def test_flushes_when_the_batch_size_is_reached(make_logger):
+    client = StubLogsClient()
+    log, _ = make_logger(client, flush_interval=60, max_batch_bytes=5000)
+
+    for _ in range(5):
+        log.info("x" * 1500)
+
+    assert wait_for(lambda: client.batches)
+    assert all(sum(len(m) + 26 for m in batch) <= 5000 for batch in client.batches)
+
+
+def test_flushes_when_the_oldest_event_is_old_enough(make_logger):
+    client = StubLogsClient()
+    log, _ = make_logger(client, flush_interval=0.2)
+
+    log.info("lonely event")
+    time.sleep(0.05)
+    assert client.batches == []
+    assert wait_for(lambda: client.batches == [["lonely event"]])
+
+
+def test_retries_throttled_batches_with_backoff(make_logger):
+    client = StubLogsClient(throttle=2)
+    log, handler = make_logger(client, flush_interval=0.05, retry_backoff=0.1)
+
+    log.info("first")
+    log.info("second")
+
+    assert wait_for(lambda: client.batches)
+    assert client.batches == [["first", "second"]]
+    assert len(client.attempts) == 3
+    # Backoff doubles: 0.1 s, then 0.2 s
+    assert client.attempts[1] - client.attempts[0] >= 0.1
+    assert client.attempts[2] - client.attempts[1] >= 0.2
+    assert handler.dropped == 0
+
+
+def test_close_sends_buffered_events(make_logger):
+    client = StubLogsClient()
+    log, handler = make_logger(client, flush_interval=60)
+
+    log.info("shutting down")
+    assert client.batches == []
+    handler.close()
+
+    assert client.batches == [["shutting down"]]
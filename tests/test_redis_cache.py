@@ -0,0 +1,97 @@
+import multiprocessing
+import threading
+import time
+
+import fakeredis
+import pytest
+import redis
+
+from app.utils import cache
+from app.utils.cache import RedisBackend, _InvalidationSubscriber
+
+CHANNEL = "test:cache-invalidation"
+
+
+@pytest.fixture(scope="module")
+def redis_url():
+    """A Redis stand-in on a local TCP port, so separate processes can share it."""
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    # Left running: invalidation listeners stay connected until the test process exits
+    return f"redis://{host}:{port}/0"
+
+
+@pytest.fixture
+def subscriber(monkeypatch):
+    subscriber = _InvalidationSubscriber()
+    monkeypatch.setattr(cache, "_subscriber", subscriber)
+    return subscriber
+
+
+def make_backend(client, subscriber, namespace="test:bookings", local_ttl=60):
+    backend = RedisBackend(client, namespace, ttl=300, local_ttl=local_ttl, channel=CHANNEL)
+    subscriber.local_backends[namespace] = backend
+    return backend
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_invalidate_tags_removes_tagged_entries_only(subscriber):
+    client = fakeredis.FakeRedis()
+    backend = make_backend(client, subscriber)
+    backend.set(1, {"user": 1}, tags=["course:7"])
+    backend.set(2, {"user": 2}, tags=["course:7", "course:8"])
+    backend.set(3, {"user": 3}, tags=["course:8"])
+
+    backend.invalidate_tags("course:7")
+
+    assert backend.get(1) is None and backend.get(2) is None
+    assert backend.get(3) == {"user": 3}
+    assert client.get("test:bookings:1") is None
+    assert not client.exists("test:bookings:tag:course:7")
+
+
+def test_entries_are_shared_between_backends(subscriber):
+    server = fakeredis.FakeServer()
+    writer = make_backend(fakeredis.FakeRedis(server=server), subscriber, local_ttl=0)
+    reader = RedisBackend(fakeredis.FakeRedis(server=server), "test:bookings", local_ttl=0)
+
+    writer.set(1, "cached", tags=["course:7"])
+    assert reader.get(1) == "cached"
+    writer.invalidate_tags("course:7")
+    assert reader.get(1) is None
+
+
+def _invalidate_in_child(url, namespace):
+    # A fresh process: its own client, backend and invalidation sender id
+    backend = RedisBackend(redis.Redis.from_url(url), namespace, local_ttl=60, channel=CHANNEL)
+    backend.delete(1)
+    backend.invalidate_tags("course:7")
+
+
+def test_other_processes_drop_their_local_copies(redis_url, subscriber):
+    client = redis.Redis.from_url(redis_url)
+    backend = make_backend(client, subscriber, namespace="test:xproc")
+    backend.set(1, "one")
+    backend.set(2, "two", tags=["course:7"])
+    backend.set(3, "three")
+    assert backend.local.get(1) == "one" and backend.local.get(2) == "two"
+    assert wait_for(lambda: dict(client.pubsub_numsub(CHANNEL)).get(CHANNEL.encode(), 0) >= 1)
+
+    child = multiprocessing.get_context("fork").Process(target=_invalidate_in_child,
+                                                        args=(redis_url, "test:xproc"))
+    child.start()
+    child.join(10)
+    assert child.exitcode == 0
+
+    assert wait_for(lambda: backend.local.get(1) is None and backend.local.get(2) is None)
+    assert backend.local.get(3) == "three"
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+from sqlalchemy import inspect, text
+
+os.environ.setdefault("FLASK_ENV", "testing")
+
+from app import create_app
+from app.models import db, User, Course, Subscriptions
+from app.services.user_service import UserService, BOOKED, ALREADY_BOOKED
+from app.utils.schema import SchemaUpgradeError, upgrade_schema
+
+
+@pytest.fixture
+def legacy_app():
+    """A database from before uq_subscriptions_user_course, holding duplicate bookings."""
+    app = create_app()
+    with app.app_context():
+        db.session.execute(text("DROP INDEX uq_subscriptions_user_course"))
+        course = Course(name="Legacy Course", description="", price=10.0, capacity=10)
+        users = [User(first_name="User", second_name=str(i), email=f"legacy{i}@example.com", password_hash="x")
+                 for i in range(3)]
+        db.session.add(course)
+        db.session.add_all(users)
+        db.session.flush()
+        for user_id in (users[0].id, users[0].id, users[0].id, users[1].id):
+            db.session.execute(
+                text("INSERT INTO subscriptions (user_id, course_id, status) VALUES (:user_id, :course_id, 'pending')"),
+                {"user_id": user_id, "course_id": course.id},
+            )
+        # Counters as the old code left them: one seat per row, duplicates included
+        course.seats_booked = course.bookings_total = course.bookings_pending = 4
+        db.session.commit()
+        yield app, course.id, [user.id for user in users]
+        db.session.remove()
+
+
+def test_duplicates_are_removed_before_the_unique_index(legacy_app):
+    app, course_id, user_ids = legacy_app
+    with app.app_context():
+        first_booking = db.session.query(db.func.min(Subscriptions.id)).scalar()
+
+        upgrade_schema(db.engine)
+
+        names = {index["name"] for index in inspect(db.engine).get_indexes("subscriptions")}
+        assert "uq_subscriptions_user_course" in names
+        rows = db.session.query(Subscriptions.id, Subscriptions.user_id).order_by(Subscriptions.id).all()
+        assert [row.user_id for row in rows] == [user_ids[0], user_ids[1]]
+        assert rows[0].id == first_booking
+
+        course = db.session.get(Course, course_id)
+        db.session.refresh(course)
+        assert (course.seats_booked, course.bookings_total, course.bookings_pending) == (2, 2, 2)
+
+        service = UserService()
+        assert service.book_course(user_ids[0], course_id) == ALREADY_BOOKED
+        assert service.book_course(user_ids[2], course_id) == BOOKED
+
+
+def test_unbuildable_unique_index_fails_loudly(legacy_app, monkeypatch):
+    app, _, _ = legacy_app
+    monkeypatch.setattr("app.utils.schema.INDEX_DEDUPES", {})
+    with app.app_context():
+        with pytest.raises(SchemaUpgradeError):
+            upgrade_schema(db.engine)
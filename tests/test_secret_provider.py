@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+from app.utils.secret_provider import LocalSecretsClient, SecretProvider
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def client():
+    return LocalSecretsClient({"db": {"username": "app", "password": "first"}})
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def provider(client, clock):
+    return SecretProvider(client=client, ttl=100, refresh_ahead=20, max_stale=50,
+                          retry_backoff=5, max_retry_backoff=40, clock=clock)
+
+
+def rotate(client, password):
+    client.secrets["db"] = {"username": "app", "password": password}
+
+
+def test_cached_until_the_ttl_expires(provider, client, clock):
+    assert provider.get("db")["password"] == "first"
+    rotate(client, "second")
+    clock.now += 79
+    assert provider.get("db")["password"] == "first"
+    assert client.calls == 1
+
+    clock.now += 30
+    # Expired: the old value is served at once while the new one is fetched
+    assert provider.get("db")["password"] == "first"
+    assert wait_for(lambda: provider.get("db")["password"] == "second")
+    assert client.calls == 2
+
+
+def test_refreshes_ahead_of_expiry_in_the_background(provider, client, clock):
+    provider.get("db")
+    rotate(client, "second")
+    clock.now += 85
+
+    assert provider.get("db")["password"] == "first"
+    assert wait_for(lambda: client.calls == 2)
+    assert provider.get("db")["password"] == "second"
+
+
+def test_serves_the_stale_value_while_fetching_fails(provider, client, clock):
+    provider.get("db")
+    client.secrets.clear()
+    clock.now += 120
+
+    assert provider.get("db")["password"] == "first"
+    assert wait_for(lambda: client.calls == 2)
+    assert wait_for(lambda: not provider._cache["db"].refreshing)
+    assert provider.get("db")["password"] == "first"
+
+    clock.now += 40
+    with pytest.raises(RuntimeError):
+        provider.get("db")
+
+
+def test_failed_fetches_back_off(provider, client, clock):
+    provider.get("db")
+    client.secrets.clear()
+    clock.now += 120
+    provider.get("db")
+    assert wait_for(lambda: client.calls == 2 and not provider._cache["db"].refreshing)
+
+    # Within the first 5 s backoff no read reaches the API
+    for _ in range(20):
+        provider.get("db")
+    time.sleep(0.05)
+    assert client.calls == 2
+
+    clock.now += 6
+    provider.get("db")
+    assert wait_for(lambda: client.calls == 3 and not provider._cache["db"].refreshing)
+    # The second failure doubles the backoff to 10 s
+    clock.now += 6
+    provider.get("db")
+    time.sleep(0.05)
+    assert client.calls == 3
+
+    rotate(client, "second")
+    clock.now += 5
+    provider.get("db")
+    assert wait_for(lambda: provider.get("db")["password"] == "second")
+    assert "db" not in provider._failures
+
+
+def test_missing_secret_raises_without_retrying_during_backoff(provider, client):
+    with pytest.raises(RuntimeError):
+        provider.get("other")
+    with pytest.raises(RuntimeError):
+        provider.get("other")
+    assert client.calls == 1